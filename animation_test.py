@@ -0,0 +1,61 @@
+from fakes import FakeClock
+from renderer.animation import Animator, ease_in_out
+
+import unittest
+
+
+class Target:
+    def __init__(self):
+        self.brightness = 0.0
+        self.position = (0, 0)
+
+
+class AnimatorTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock(10.0)
+        self.animator = Animator(clock=self.clock)
+        self.target = Target()
+
+    def test_animates_many_properties(self):
+        self.animator.animate(self.target, 'brightness', 1.0, duration=2.0)
+        self.animator.animate(self.target, 'position', (8, 4), duration=4.0,
+                              easing=ease_in_out)
+
+        self.clock.now += 1.0
+        self.assertTrue(self.animator.step())
+        self.assertAlmostEqual(self.target.brightness, 0.5)
+        self.assertEqual(self.target.position, (1.0, 0.5))
+
+        self.clock.now += 3.0
+        self.animator.step()
+        self.assertEqual(self.target.brightness, 1.0)
+        self.assertEqual(self.target.position, (8, 4))
+        self.assertIsNone(self.animator.next_change())
+        self.assertFalse(self.animator.step())
+
+    def test_next_change_waits_for_delayed_animation(self):
+        self.assertIsNone(self.animator.next_change())
+
+        self.animator.animate(self.target, 'brightness', 1.0, duration=1.0,
+                              delay=5.0)
+        self.assertEqual(self.animator.next_change(), 15.0)
+        self.assertFalse(self.animator.step())
+
+    def test_next_change_of_running_animation_is_its_start(self):
+        self.animator.animate(self.target, 'brightness', 1.0, duration=1.0)
+        self.clock.now += 0.5
+        self.assertEqual(self.animator.next_change(), 10.0)
+
+    def test_animation_replaces_running_animation(self):
+        self.animator.animate(self.target, 'brightness', 1.0, duration=2.0)
+        self.clock.now += 1.0
+        self.animator.step()
+
+        self.animator.animate(self.target, 'brightness', 0.0, duration=1.0)
+        self.clock.now += 0.5
+        self.animator.step()
+        self.assertAlmostEqual(self.target.brightness, 0.25)
+
+
+if __name__ == '__main__':
+    unittest.main()
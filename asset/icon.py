@@ -1,4 +1,6 @@
-SUN = {
+from asset.sprite import Sprite
+
+SUN_BITMAP = {
   'pallete': [ 0xFBEF42, 0xF4D637 ],
   'data': [ 0, 0, 1, 1, 0, 0,
             0, 1, 1, 1, 1, 0,
@@ -9,7 +11,7 @@ SUN = {
   'width': 6,
 }
 
-STORM = {
+STORM_BITMAP = {
   'pallete': [ 0xB8B8B8, 0x3E3E3E, 0xFBEF42, 0x91C7EE, 0x2E95CE ],
   'data': [ 0, 1, 1, 0, 0, 0,
             1, 1, 2, 1, 1, 0,
@@ -20,7 +22,7 @@ STORM = {
   'width': 6,
 }
 
-RAIN = {
+RAIN_BITMAP = {
   'pallete': [ 0xFFFFFF, 0x666666, 0xFBEF42, 0x91C7EE, 0x2E95CE ],
   'data': [ 0, 1, 1, 0, 0, 0,
             1, 1, 2, 1, 1, 0,
@@ -29,4 +31,8 @@ RAIN = {
             0, 5, 4, 5, 4, 5,
             5, 4, 5, 4, 5, 0 ],
   'width': 6,
-}
\ No newline at end of file
+}
+
+SUN = Sprite.from_bitmap(SUN_BITMAP)
+STORM = Sprite.from_bitmap(STORM_BITMAP)
+RAIN = Sprite.from_bitmap(RAIN_BITMAP)
@@ -0,0 +1,39 @@
+import numpy as np
+
+
+class Sprite:
+    def __init__(self, rgb, alpha):
+        rgb.flags.writeable = False
+        alpha.flags.writeable = False
+
+        self.rgb = rgb
+        self.alpha = alpha
+        self.height, self.width = alpha.shape
+        self._scaled = {1: self}
+
+    @classmethod
+    def from_bitmap(cls, bitmap):
+        # Palette bitmaps index into 'pallete' starting at 1; 0 is transparent.
+        data = bitmap['data']
+        width = bitmap['width']
+        height = int(len(data) / width)
+
+        pallete = np.array(
+            [(0, 0, 0)] + [((value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF)
+                           for value in bitmap['pallete']], dtype=np.uint8)
+        indices = np.array(data, dtype=np.intp).reshape(height, width)
+
+        return cls(pallete[indices], indices != 0)
+
+    def scaled(self, scale):
+        sprite = self._scaled.get(scale)
+        if not sprite:
+            sprite = Sprite(
+                self.rgb.repeat(scale, axis=0).repeat(scale, axis=1),
+                self.alpha.repeat(scale, axis=0).repeat(scale, axis=1))
+            self._scaled[scale] = sprite
+        return sprite
+
+
+def as_sprite(bitmap):
+    return bitmap if isinstance(bitmap, Sprite) else Sprite.from_bitmap(bitmap)
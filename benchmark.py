@@ -0,0 +1,191 @@
+from PIL import Image
+
+from asset.icon import STORM
+from renderer.image_sink import ImageSink
+from renderer.renderer import Anchor, Renderer, RendererSink
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SIZES = [32, 64, 128, 256]
+SINKS = {
+    'dummy': RendererSink,
+    'image': ImageSink,
+}
+
+
+def gradient_image(width, height):
+    image = Image.new('RGB', (width, height))
+    image.putdata([((x * 7) % 256, (y * 5) % 256, ((x + y) * 3) % 256)
+                   for y in range(height) for x in range(width)])
+    return image
+
+
+def make_cases(renderer, size):
+    image = gradient_image(size * 2, size + size // 2)
+    renderer.draw_image(image, 0.5)
+    layer = renderer.add_layer('text')
+    brightness = [0.0]
+    red = [0]
+
+    def draw_image():
+        # Steps through a fade like PixelFrame does.
+        brightness[0] = (brightness[0] + 0.01) % 1.0
+        renderer.draw_image(image, brightness[0])
+
+    def draw_string():
+        renderer.draw_string('12:34', anchor=Anchor.TOP | Anchor.LEFT,
+                             color=(255, 255, 255))
+
+    def draw_string_auto_color():
+        renderer.draw_string('12:34', anchor=Anchor.TOP | Anchor.LEFT)
+
+    def draw_string_layer():
+        # Drawn at the renderer's scale and upscaled once when composited.
+        layer.draw_string('12:34', anchor=Anchor.TOP | Anchor.LEFT,
+                          color=(255, 255, 255))
+
+    def draw_bitmap():
+        renderer.draw_bitmap(STORM, 1, 1)
+
+    def putpixel_scaled():
+        renderer.putpixel((2, 2), (255, 0, 0), scale=4)
+
+    def render_full():
+        draw_image()
+        renderer.render()
+
+    def render_small_change():
+        red[0] ^= 0xFF
+        renderer.putpixel((size // 2, size // 2), (red[0], 0, 0))
+        renderer.render()
+
+    return {
+        'draw_image': draw_image,
+        'draw_string': draw_string,
+        'draw_string_auto_color': draw_string_auto_color,
+        'draw_string_layer': draw_string_layer,
+        'draw_bitmap': draw_bitmap,
+        'putpixel_scaled': putpixel_scaled,
+        'render_full': render_full,
+        'render_small_change': render_small_change,
+    }
+
+
+def measure(function, repeat):
+    function()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return {
+        'iterations': repeat,
+        'mean_us': statistics.mean(timings),
+        'median_us': statistics.median(timings),
+        'min_us': min(timings),
+    }
+
+
+def run(sizes, sinks, scales, repeat):
+    results = []
+    for sink_name in sinks:
+        for size in sizes:
+            for scale in scales:
+                # Sinks such as ImageSink write their output to the working
+                # directory and the renderer logs on construction.
+                with tempfile.TemporaryDirectory() as directory:
+                    cwd = os.getcwd()
+                    os.chdir(directory)
+                    try:
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            renderer = Renderer(
+                                SINKS[sink_name]((size, size)), scale=scale)
+                        for case, function in make_cases(renderer, size).items():
+                            result = measure(function, repeat)
+                            result.update(case=case, sink=sink_name,
+                                          size=size, scale=scale)
+                            results.append(result)
+                            print('%-24s %-6s %4dpx x%d %10.1f us' % (
+                                case, sink_name, size, scale, result['median_us']))
+                    finally:
+                        os.chdir(cwd)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, 'r') as file:
+        baseline = json.loads(file.read())
+
+    key = lambda result: (result['case'], result['sink'], result['size'], result['scale'])
+    previous = {key(result): result for result in baseline['results']}
+
+    regressions = 0
+    for result in results:
+        before = previous.get(key(result))
+        if not before:
+            continue
+
+        ratio = result['median_us'] / before['median_us']
+        if ratio > threshold:
+            regressions += 1
+            print('REGRESSION %-24s %-6s %4dpx x%d %.2fx slower' % (
+                *key(result), ratio))
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Renderer micro-benchmarks')
+    parser.add_argument('-o', '--output', default='benchmark.json',
+                    help='Where to write the JSON results.')
+    parser.add_argument('-n', '--sizes', default=SIZES, type=int, nargs='+',
+                    help='The panel sizes (squared) to benchmark.')
+    parser.add_argument('-s', '--sinks', default=sorted(SINKS), nargs='+',
+                    choices=sorted(SINKS), help='The sinks to benchmark.')
+    parser.add_argument('-q', '--scales', default=[1, 2], type=int, nargs='+',
+                    help='The renderer scales to benchmark.')
+    parser.add_argument('-r', '--repeat', default=50, type=int,
+                    help='The number of timed calls per case.')
+    parser.add_argument('-c', '--compare',
+                    help='A previous JSON result to check for regressions.')
+    parser.add_argument('-t', '--threshold', default=1.2, type=float,
+                    help='The slowdown ratio reported as a regression.')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run(args.sizes, args.sinks, args.scales, args.repeat)
+
+    with open(args.output, 'w') as file:
+        file.write(json.dumps({
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': results,
+        }, indent=2))
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+from plugin.cast_album_art import CastPlugin
+from pychromecast.error import ChromecastConnectionError
+
+import threading
+import unittest
+from unittest import mock
+
+
+class FakeListener:
+    def __init__(self, services):
+        self.services = services
+
+
+class FakeSocketClient:
+    def __init__(self):
+        self.started = threading.Event()
+
+    def start(self):
+        self.started.set()
+
+
+class FakeCast:
+    def __init__(self, name):
+        self.device = mock.Mock(friendly_name=name)
+        self.socket_client = FakeSocketClient()
+        self.handlers = []
+        self.disconnected = False
+
+    def register_handler(self, handler):
+        self.handlers.append(handler)
+
+    def disconnect(self, blocking=True):
+        self.disconnected = True
+
+
+class CastPluginTest(unittest.TestCase):
+    def setUp(self):
+        self.plugin = CastPlugin()
+        self.plugin._listener = FakeListener({
+            'living room': ('10.0.0.2', 8009, 'uuid', 'Chromecast', 'Living Room'),
+        })
+
+    @mock.patch('pychromecast._get_chromecast_from_host')
+    def test_connects_and_starts_the_socket(self, get_chromecast):
+        cast = FakeCast('Living Room')
+        get_chromecast.return_value = cast
+
+        self.plugin._add_cast('living room')
+        self.assertTrue(cast.socket_client.started.wait(5))
+
+        _, kwargs = get_chromecast.call_args
+        self.assertFalse(kwargs['blocking'])
+        self.assertIsNotNone(kwargs['tries'])
+        self.assertIsNotNone(kwargs['timeout'])
+        self.assertEqual(len(cast.handlers), 1)
+        self.assertIs(self.plugin._casts['living room'], cast)
+
+        self.plugin._remove_cast('living room')
+        self.assertTrue(cast.disconnected)
+
+    @mock.patch('pychromecast._get_chromecast_from_host')
+    def test_unreachable_device_is_skipped(self, get_chromecast):
+        get_chromecast.side_effect = ChromecastConnectionError('unreachable')
+
+        self.plugin._connect_cast(
+            'living room', self.plugin._listener.services['living room'])
+        self.assertEqual(self.plugin._casts, {})
+
+    def test_new_media_status_sets_the_smallest_image(self):
+        instance = mock.Mock()
+        self.plugin._instance = instance
+        status = mock.Mock(images=[
+            mock.Mock(url='large', width=1000, height=1000),
+            mock.Mock(url='small', width=100, height=100),
+        ])
+
+        self.plugin.new_media_status(status)
+        self.plugin.new_media_status(status)
+        instance.set_background_url.assert_called_once_with('small')
+
+
+if __name__ == '__main__':
+    unittest.main()
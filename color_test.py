@@ -0,0 +1,97 @@
+from fakes import CaptureSink
+from renderer.color import ColorPipeline
+from renderer.renderer import Renderer
+
+import numpy as np
+import unittest
+
+
+def gradient(height=8, width=8):
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    frame[...] = (np.arange(height * width).reshape(height, width, 1) * 4) % 256
+    return frame
+
+
+class ColorPipelineTest(unittest.TestCase):
+    def apply(self, pipeline, frame):
+        out = np.empty_like(frame)
+        pipeline.apply(frame, out)
+        return out
+
+    def test_identity(self):
+        pipeline = ColorPipeline()
+        self.assertTrue(pipeline.is_identity())
+        frame = gradient()
+        np.testing.assert_array_equal(self.apply(pipeline, frame), frame)
+
+    def test_gamma_balance_and_brightness(self):
+        pipeline = ColorPipeline(gamma=2.0, balance=(1.0, 0.5, 0.0),
+                                 brightness=0.5)
+        out = self.apply(pipeline, np.full((1, 1, 3), 255, dtype=np.uint8))
+        self.assertEqual(out[0, 0].tolist(), [128, 64, 0])
+
+        out = self.apply(pipeline, np.full((1, 1, 3), 128, dtype=np.uint8))
+        self.assertEqual(out[0, 0, 0], round(255 * (128 / 255) ** 2 * 0.5))
+
+    def test_luts_are_only_rebuilt_on_change(self):
+        pipeline = ColorPipeline(gamma=2.2)
+        luts = pipeline.luts()
+        version = pipeline.version
+
+        pipeline.gamma = 2.2
+        self.assertIs(pipeline.luts(), luts)
+        self.assertEqual(pipeline.version, version)
+
+        pipeline.brightness = 0.5
+        self.assertIsNot(pipeline.luts(), luts)
+        self.assertEqual(pipeline.version, version + 1)
+
+    def test_dither_averages_to_the_exact_level(self):
+        pipeline = ColorPipeline(brightness=0.033, dither=True)
+        frame = np.full((8, 8, 3), 100, dtype=np.uint8)
+        self.assertEqual(pipeline.luts()[1][0, 100], 3)
+
+        total = np.zeros(frame.shape)
+        for _ in range(16):
+            total += self.apply(pipeline, frame)
+            pipeline.next_frame()
+        np.testing.assert_allclose(total / 16, 3.3, atol=0.02)
+
+    def test_dithered_bands_match_the_whole_frame(self):
+        pipeline = ColorPipeline(brightness=0.1, dither=True)
+        frame = gradient(12, 10)
+        whole = self.apply(pipeline, frame)
+
+        banded = np.empty_like(frame)
+        for rows in (slice(0, 5), slice(5, 12)):
+            pipeline.apply(frame, banded, rows)
+        np.testing.assert_array_equal(banded, whole)
+
+
+class RendererColorTest(unittest.TestCase):
+    def test_output_stage(self):
+        sink = CaptureSink((4, 4))
+        renderer = Renderer(sink, color=ColorPipeline(brightness=0.5))
+        renderer.putpixel((1, 1), (200, 100, 50))
+        renderer.render()
+        self.assertEqual(sink.frames[-1][1, 1].tolist(), [100, 50, 25])
+
+        # Changing the pipeline alone produces a new frame.
+        renderer.color.brightness = 1.0
+        renderer.render()
+        self.assertEqual(len(sink.frames), 2)
+        self.assertEqual(sink.frames[-1][1, 1].tolist(), [200, 100, 50])
+
+        renderer.render()
+        self.assertEqual(len(sink.frames), 2)
+
+    def test_auto_color_reads_the_uncorrected_frame(self):
+        renderer = Renderer(CaptureSink((4, 4)), color=ColorPipeline(brightness=0.1))
+        renderer.putpixel((0, 0), (200, 200, 200))
+        renderer.render()
+        self.assertEqual(renderer._backdrop(renderer.layer('default'))[0, 0].tolist(),
+                         [200, 200, 200])
+
+
+if __name__ == '__main__':
+    unittest.main()
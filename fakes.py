@@ -0,0 +1,30 @@
+from renderer.renderer import RendererSink, as_frame
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class CaptureSink(RendererSink):
+    def __init__(self, size):
+        RendererSink.__init__(self, size)
+        self.pixels = {}
+        self.pushes = []
+        self.frames = []
+
+    def push_frame(self, frame, dirty=None):
+        self.pushes.append(dirty)
+        self.frames.append(as_frame(frame, self._size).copy())
+        RendererSink.push_frame(self, frame, dirty)
+
+    def putpixel(self, position, color):
+        self.pixels[position] = tuple(color)
+
+    def frame(self):
+        width, height = self._size
+        return [self.pixels.get((x, y), (0, 0, 0))
+                for y in range(height) for x in range(width)]
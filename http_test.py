@@ -0,0 +1,76 @@
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from net.http import HttpClient
+from plugin.weather import OAuthHook
+
+import gzip
+import threading
+import unittest
+
+BODY = b'{"temperature": 61}'
+ETAG = '"v1"'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    requests = []
+
+    def do_GET(self):
+        StandInHandler.requests.append((self.client_address, dict(self.headers)))
+
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.send_header('ETag', ETAG)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        body = BODY
+        self.send_response(200)
+        self.send_header('ETag', ETAG)
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpClientTest(unittest.TestCase):
+    def setUp(self):
+        StandInHandler.requests = []
+        self.server = HTTPServer(('127.0.0.1', 0), StandInHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://127.0.0.1:%d/forecast' % self.server.server_port
+        self.client = HttpClient(timeout=(1, 1))
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_conditional_requests_reuse_one_connection(self):
+        self.assertEqual(self.client.get_content(self.url), BODY)
+        self.assertEqual(self.client.get_content(self.url), BODY)
+
+        (first, first_headers), (second, second_headers) = StandInHandler.requests
+        self.assertEqual(first, second)
+        self.assertIn('gzip', first_headers['Accept-Encoding'])
+        self.assertNotIn('If-None-Match', first_headers)
+        self.assertEqual(second_headers['If-None-Match'], ETAG)
+
+    def test_hooks_sign_requests(self):
+        hook = OAuthHook({'key': 'key', 'secret': 'secret', 'app_id': 'app'})
+        self.client.get_content(self.url, {'location': 94040}, hooks=[hook])
+
+        _, headers = StandInHandler.requests[0]
+        self.assertTrue(headers['Authorization'].startswith('OAuth '))
+        self.assertIn('oauth_signature=', headers['Authorization'])
+        self.assertEqual(headers['Yahoo-App-Id'], 'app')
+
+
+if __name__ == '__main__':
+    unittest.main()
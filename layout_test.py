@@ -0,0 +1,71 @@
+from renderer.layout import PanelLayout
+
+import numpy as np
+import unittest
+
+
+def numbered(size):
+    width, height = size
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    frame[..., 0] = np.arange(width)[None, :]
+    frame[..., 1] = np.arange(height)[:, None]
+    return frame
+
+
+class PanelLayoutTest(unittest.TestCase):
+    def test_single_chain_is_identity(self):
+        layout = PanelLayout(rows=64, cols=64, chain_length=2)
+        self.assertEqual(layout.size(), (128, 64))
+        self.assertTrue(layout.identity)
+
+        frame = numbered(layout.size())
+        self.assertIs(layout.to_physical(frame), frame)
+
+    def test_parallel_chains_stack(self):
+        layout = PanelLayout(rows=32, cols=64, chain_length=1, parallel=2)
+        self.assertEqual(layout.size(), (64, 64))
+        self.assertEqual(layout.physical_size(), (64, 64))
+        self.assertTrue(layout.identity)
+
+    def test_folded_chain(self):
+        # Four 64x64 panels on one chain shown as a 128x128 square.
+        layout = PanelLayout(rows=64, cols=64, chain_length=4, panel_columns=2)
+        self.assertEqual(layout.size(), (128, 128))
+        self.assertEqual(layout.physical_size(), (256, 64))
+
+        physical = layout.to_physical(numbered(layout.size()))
+        self.assertEqual(physical.shape, (64, 256, 3))
+        # The third panel is the bottom left of the canvas.
+        self.assertEqual(tuple(physical[5, 128 + 3, :2]), (3, 64 + 5))
+
+        self.assertEqual(layout.map_boxes([(60, 60, 70, 70)]), [
+            (60, 60, 64, 64), (64, 60, 70, 64),
+            (188, 0, 192, 6), (192, 0, 198, 6)])
+
+    def test_serpentine_chain(self):
+        layout = PanelLayout(rows=32, cols=32, chain_length=4, panel_columns=2,
+                             serpentine=True)
+        physical = layout.to_physical(numbered(layout.size()))
+
+        # The third panel is the bottom right of the canvas, upside down.
+        self.assertEqual(tuple(physical[0, 64, :2]), (63, 63))
+        self.assertEqual(tuple(physical[31, 95, :2]), (32, 32))
+        self.assertEqual(layout.map_boxes([(62, 62, 64, 64)]), [(64, 0, 66, 2)])
+
+        # Mapped boxes cover exactly the pixels the full mapping moves.
+        frame = numbered(layout.size())
+        changed = frame.copy()
+        changed[40:50, 10:60] = 255
+        expected = layout.to_physical(changed)
+        patched = layout.to_physical(frame).copy()
+        for left, top, right, bottom in layout.map_boxes([(10, 40, 60, 50)]):
+            patched[top:bottom, left:right] = expected[top:bottom, left:right]
+        np.testing.assert_array_equal(patched, expected)
+
+    def test_rejects_uneven_folding(self):
+        with self.assertRaises(Exception):
+            PanelLayout(chain_length=3, panel_columns=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
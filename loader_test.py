@@ -0,0 +1,163 @@
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import BytesIO
+from PIL import Image
+
+from media.cache import ArtCache
+from media.loader import ArtLoader
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+
+def jpeg_bytes(color, size=(256, 192)):
+    output = BytesIO()
+    Image.new('RGB', size, color).save(output, 'JPEG')
+    return output.getvalue()
+
+
+class ArtHandler(BaseHTTPRequestHandler):
+    images = {
+        '/red': jpeg_bytes((255, 0, 0)),
+        '/blue': jpeg_bytes((0, 0, 255)),
+        '/huge': jpeg_bytes((0, 255, 0), size=(2048, 2048)),
+    }
+
+    requests = 0
+
+    def do_GET(self):
+        ArtHandler.requests += 1
+        if self.path == '/red':
+            time.sleep(0.3)
+
+        body = self.images[self.path]
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ArtLoaderTest(unittest.TestCase):
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), ArtHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = 'http://127.0.0.1:%d' % self.server.server_port
+
+        self.loaded = []
+        self.threads = []
+        self.event = threading.Event()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def on_loaded(self, image):
+        self.loaded.append(image)
+        self.threads.append(threading.current_thread())
+        self.event.set()
+
+    def test_only_newest_url_is_published(self):
+        loader = ArtLoader((32, 32), self.on_loaded)
+        loader.load(self.base_url + '/red')
+        loader.load(self.base_url + '/blue')
+
+        self.assertTrue(self.event.wait(5))
+        time.sleep(0.5)
+        loader.shutdown()
+
+        self.assertEqual(len(self.loaded), 1)
+        self.assertEqual(self.loaded[0].size, (32, 32))
+        red, green, blue = self.loaded[0].getpixel((16, 16))
+        self.assertGreater(blue, 200)
+        self.assertLess(red, 50)
+
+    def test_oversized_body_is_rejected(self):
+        loader = ArtLoader((32, 32), self.on_loaded, max_bytes=1024)
+        loader.load(self.base_url + '/huge')
+
+        self.assertFalse(self.event.wait(1))
+        loader.shutdown()
+
+    def test_cached_art_skips_the_network(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        loader = ArtLoader((32, 32), self.on_loaded,
+                           cache=ArtCache((32, 32), directory.name))
+        loader.load(self.base_url + '/blue')
+        self.assertTrue(self.event.wait(5))
+        requests = ArtHandler.requests
+
+        # A fresh memory tier still finds the frame on disk.
+        self.event.clear()
+        loader = ArtLoader((32, 32), self.on_loaded,
+                           cache=ArtCache((32, 32), directory.name))
+        loader.load(self.base_url + '/blue')
+        self.assertTrue(self.event.wait(5))
+
+        # Memory hits are published from a worker, never the caller.
+        self.event.clear()
+        loader.load(self.base_url + '/blue')
+        self.assertTrue(self.event.wait(5))
+        loader.shutdown()
+
+        self.assertEqual(ArtHandler.requests, requests)
+        self.assertEqual(len(self.loaded), 3)
+        self.assertNotIn(threading.current_thread(), self.threads)
+        self.assertEqual(len(os.listdir(directory.name)), 1)
+
+
+    def test_load_does_not_wait_for_on_loaded(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache = ArtCache((32, 32), directory.name)
+        cache.put('red', Image.new('RGB', (32, 32), (255, 0, 0)))
+        cache.put('blue', Image.new('RGB', (32, 32), (0, 0, 255)))
+
+        def slow_on_loaded(image):
+            self.on_loaded(image)
+            time.sleep(1.0)
+
+        loader = ArtLoader((32, 32), slow_on_loaded, cache=cache)
+        loader.load('red')
+        self.assertTrue(self.event.wait(5))
+
+        start = time.monotonic()
+        loader.load('blue')
+        self.assertLess(time.monotonic() - start, 0.5)
+        loader.shutdown()
+
+
+class ArtCacheTest(unittest.TestCase):
+    def test_budgets_evict_least_recently_used(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        cache = ArtCache((32, 32), directory.name,
+                         memory_budget=2 * 32 * 32 * 3, disk_budget=1)
+        for color in ('red', 'green', 'blue'):
+            cache.put(color, Image.new('RGB', (32, 32), color))
+
+        self.assertIsNone(cache.get_memory('red'))
+        self.assertIsNotNone(cache.get_memory('blue'))
+
+    def test_failed_disk_write_leaves_no_file(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache = ArtCache((32, 32), directory.name)
+
+        with mock.patch('os.replace', side_effect=OSError('disk full')):
+            cache.put('red', Image.new('RGB', (32, 32), (255, 0, 0)))
+        self.assertEqual(os.listdir(directory.name), [])
+        self.assertLessEqual(len(os.listdir(directory.name)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
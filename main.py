@@ -1,111 +1,271 @@
-from PIL import Image
-
-from plugin.cast_album_art import CastPlugin
-from plugin.weather import WeatherPlugin
+from concurrent.futures import ThreadPoolExecutor, wait
+from media.cache import ArtCache
+from media.loader import ArtLoader
+from renderer.animation import Animator
+from renderer.color import ColorPipeline
+from renderer.layout import PanelLayout
+from renderer.metrics import Metrics, NULL_METRICS
+from renderer.palette import Palette
+from renderer.record_sink import RecordingSink
 from renderer.renderer import Anchor, Renderer
+from renderer.scheduler import DEFAULT_FPS, FrameScheduler
+from renderer.transition import FADE, TRANSITIONS, Transition
 
 import argparse
+import importlib
 import math
-import requests
+import numpy as np
 import sys
 import threading
 import time
 
+# Plugins and sinks are imported only when selected; several of them pull in
+# slow to import dependencies.
+PLUGINS = {
+    'cast': 'plugin.cast_album_art.CastPlugin',
+    'weather': 'plugin.weather.WeatherPlugin',
+}
 
-class Tween:
-    def __init__(self, start_value, end_value, duration):
-        self._start_time = time.time()
-        self._start_value = start_value
-        self._end_value = end_value
-        self._duration = duration
-        self._current_value = start_value  
+SINKS = {
+    'matrix': 'renderer.matrix_sink.MatrixSink',
+    'image': 'renderer.image_sink.ImageSink',
+    'gui': 'renderer.tk_sink.TkSink',
+    'dummy': 'renderer.renderer.RendererSink',
+    'network': 'renderer.network_sink.NetworkSink',
+}
 
-    def update(self):
-        delta_value = self._end_value - self._start_value
-        delta_time = (time.time() - self._start_time)
-        percentage = delta_time / self._duration
+# Plugins still setting up after this many seconds finish in the background.
+STARTUP_DEADLINE = 1.0
+FIRST_FRAME_TIMEOUT = 5.0
+BACKGROUND_BRIGHTNESS = 0.5
+TRANSITION_SECONDS = 2.0
 
-        self._current_value = (delta_value * percentage) + self._start_value
-        
-        if self._current_value > self._end_value:
-            self._current_value = self._end_value
 
-        return self._current_value
+def load_class(path):
+    module_name, class_name = path.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)
 
-    def current_value(self):
-        return self._current_value
 
-    def is_end(self):
-        return (self._current_value == self._end_value)
+class StartupTimer:
+    def __init__(self):
+        self._start = self._last = time.monotonic()
+
+    def phase(self, name):
+        now = time.monotonic()
+        print('Startup: %s took %.0f ms (%.0f ms total)' % (
+            name, (now - self._last) * 1000, (now - self._start) * 1000))
+        self._last = now
 
 
 class PixelFrame(threading.Thread):
-    def __init__(self, renderer_sink, **kwargs):
+    def __init__(self, renderer_sink, fps=DEFAULT_FPS, metrics=NULL_METRICS,
+                 transition=FADE, **kwargs):
         threading.Thread.__init__(self)
         self.daemon = True
 
+        self._metrics = metrics
+        self._fps = fps
+
         self._condvar = threading.Condition()
+        self._animator = Animator(clock=time.monotonic)
+        self._scheduler = FrameScheduler(fps, clock=time.monotonic)
         self._shutdown = False
 
-        self._renderer = Renderer(renderer_sink, **kwargs)
+        self._renderer = Renderer(renderer_sink, metrics=metrics, **kwargs)
         self._background = None
+        self._palette = None
+        self._background_brightness = BACKGROUND_BRIGHTNESS
+        self._transition_kind = transition
+        self._transition = None
+        # Guards the background state, which set_background() replaces on
+        # another thread while the frame thread paints and clears it.
+        self._background_lock = threading.Lock()
+        # The background keeps the panel's full resolution; everything else
+        # is drawn at the renderer's scale.
+        self._background_layer = self._renderer.add_layer(
+            'background', self._paint_background, scale=1)
+        self._clock_layer = self._renderer.add_layer('clock', self._paint_clock)
+        self._clock_text = None
+        self._art_loader = ArtLoader(
+            self._renderer.size(), self.set_background,
+            cache=ArtCache(self._renderer.size()))
         self._plugins = []
+        self._first_frame = threading.Event()
 
-        self._background_tween = Tween(start_value=0.0, end_value=0.5, duration=2.0)
-
-        self._current_time = time.strftime('%-I:%M', time.localtime())
-        self._begun = False
         self.start()
 
+    def wait_for_first_frame(self, timeout=None):
+        return self._first_frame.wait(timeout)
+
     def shutdown(self):
+        self._art_loader.shutdown()
+        for plugin in self._plugins:
+            if hasattr(plugin, 'shutdown'):
+                plugin.shutdown()
+
         with self._condvar:
             self._shutdown = True
             self._condvar.notify()
 
         self.join()
 
-    def add_plugin(self, plugin):
+    def add_plugin(self, plugin, layer=None):
+        # Each plugin draws into its own layer from its update() method.
         self._plugins.append(plugin)
-        plugin.setup_plugin(self, self._renderer)
+        layer = layer or self._renderer.add_layer(plugin.__class__.__name__)
+        layer.paint = lambda layer: plugin.update()
+        layer.invalidate()
+        plugin.setup_plugin(self, layer)
+
+    def add_plugins(self, factories, deadline=STARTUP_DEADLINE):
+        # |factories| is a list of (name, callable) pairs creating plugins.
+        # Layers are added up front so the stacking order does not depend on
+        # which plugin finishes setting up first.
+        layers = [self._renderer.add_layer(name) for name, _ in factories]
+
+        executor = ThreadPoolExecutor(max_workers=max(len(factories), 1))
+        futures = [executor.submit(self._setup_plugin, name, factory, layer)
+                   for (name, factory), layer in zip(factories, layers)]
+        executor.shutdown(wait=False)
+
+        _, pending = wait(futures, timeout=deadline)
+        if pending:
+            print('Startup: %d plugin(s) still setting up in the background' % (
+                len(pending)))
+
+    def _setup_plugin(self, name, factory, layer):
+        start = time.monotonic()
+        try:
+            self.add_plugin(factory(), layer)
+        except Exception as e:
+            print('Failed to set up plugin %s: %s' % (name, e))
+            return
+
+        print('Startup: plugin %s took %.0f ms' % (
+            name, (time.monotonic() - start) * 1000))
+
+    @property
+    def animator(self):
+        return self._animator
+
+    @property
+    def color(self):
+        # Changes, e.g. dimming the panel at night, show on the next frame.
+        return self._renderer.color
+
+    @property
+    def background_brightness(self):
+        return self._background_brightness
+
+    @background_brightness.setter
+    def background_brightness(self, brightness):
+        if brightness != self._background_brightness:
+            self._background_brightness = brightness
+            self._background_layer.invalidate()
 
     def run(self):
         while True:
             with self._condvar:
-                if self._shutdown:
-                    return
-
-                new_time = time.strftime('%-I:%M', time.localtime())
-                if self._current_time != new_time:
-                    self._current_time = new_time
-                    self.update()
+                while True:
+                    if self._shutdown:
+                        return
+
+                    next_change = self._animator.next_change()
+                    if self._renderer.color.dithering():
+                        # Temporal dithering needs every frame to be drawn.
+                        next_change = 0.0
+
+                    timeout = self._scheduler.timeout(next_change)
+                    if not timeout:
+                        break
+
+                    self._condvar.wait(timeout)
+
+                dropped = self._scheduler.dropped_frames
+                self._scheduler.begin_frame()
+                self._metrics.count(
+                    'dropped_frames', self._scheduler.dropped_frames - dropped)
+
+            with self._metrics.stage('frame'):
+                with self._metrics.stage('animate'):
+                    self._animator.step()
+                self._draw_frame()
+            self._metrics.frame()
+            self._first_frame.set()
+
+    def set_background(self, image, transition=None):
+        # Usually called on the art loader's thread, which also prepares the
+        # transition frames and analyses the image for the text drawn over
+        # it. A running transition is interrupted and the new one starts from
+        # whatever it was showing.
+        palette = Palette(self._renderer.image_frame(image))
+        new = self._renderer.image_frame(image, self._background_brightness)
+        with self._background_lock:
+            old = self._current_background()
+        transition = Transition(
+            old, new, transition or self._transition_kind,
+            steps=int(round(TRANSITION_SECONDS * self._fps)))
+
+        with self._background_lock:
+            previous = self._transition
+            if previous:
+                self._animator.cancel(previous, 'progress')
+            self._animator.animate(transition, 'progress', 1.0,
+                                   duration=TRANSITION_SECONDS)
+
+            self._background = image
+            self._palette = palette
+            self._transition = transition
+        self._background_layer.invalidate()
+        self.update()
 
-                if not self._background_tween.is_end() and self._begun:
-                    self._background_tween.update()
-                    self.update()
+    def _current_background(self):
+        transition = self._transition
+        if transition:
+            return transition.frame()
 
-                if self._background_tween.is_end():
-                    self._condvar.wait(timeout=0.5)
+        if self._background:
+            return self._renderer.image_frame(
+                self._background, self._background_brightness)
 
-    def set_background(self, image):
-        self._background = image
-        self._background_tween = Tween(start_value=0.0, end_value=0.5, duration=2.0)
-        self.update()
-        self._begun = True
+        width, height = self._renderer.size()
+        return np.zeros((height, width, 3), dtype=np.uint8)
 
     def set_background_url(self, url):
-        image = Image.open(requests.get(url, stream=True).raw)
-        self.set_background(image)
+        # Downloads and decodes in the background; set_background() is called
+        # with the panel sized image once the newest requested URL arrives.
+        self._art_loader.load(url)
 
     def update(self):
-        if self._background:
-            self._renderer.draw_image(self._background, self._background_tween.current_value())
+        with self._condvar:
+            self._scheduler.request()
+            self._condvar.notify()
 
-        self._renderer.draw_string(
-                time.strftime('%-I:%M', time.localtime()),
-                anchor=Anchor.TOP | Anchor.LEFT)
+    def _paint_background(self, layer):
+        with self._background_lock:
+            transition = self._transition
+            if transition and transition.is_done():
+                transition = self._transition = None
+            background, palette = self._background, self._palette
 
-        for plugin in self._plugins:
-            plugin.update()
+        if transition:
+            layer.draw_frame(transition.frame())
+        elif background:
+            layer.draw_image(background, self._background_brightness, palette)
+
+    def _paint_clock(self, layer):
+        layer.draw_string(self._clock_text, anchor=Anchor.TOP | Anchor.LEFT)
+
+    def _draw_frame(self):
+        clock_text = time.strftime('%-I:%M', time.localtime())
+        if clock_text != self._clock_text:
+            self._clock_text = clock_text
+            self._clock_layer.invalidate()
+
+        # Transitions are animated outside of the layer so it is repainted
+        # while one runs; unchanged steps are never sent to the sink.
+        if self._transition:
+            self._background_layer.invalidate()
 
         self._renderer.render()
 
@@ -114,40 +274,101 @@ url = ('https://www2.padi.com/blog/wp-content/uploads/2015/06/'
        'manatee-crystal-river-florida-e1458927615956.jpg')
 
 
+def add_display_arguments(parser):
+    parser.add_argument('-n', '--number', type=int,
+                    help='The number of pixels (squared) making up the display; '
+                         'defaults to 32, or to the size of the matrix panels.')
+    parser.add_argument('--width', type=int,
+                    help='The width of the display in pixels; overrides --number.')
+    parser.add_argument('--height', type=int,
+                    help='The height of the display in pixels; overrides --number.')
+    parser.add_argument('--panel-rows', default=32, type=int,
+                    help='The number of rows of each matrix panel.')
+    parser.add_argument('--panel-cols', default=32, type=int,
+                    help='The number of columns of each matrix panel.')
+    parser.add_argument('--chain', default=1, type=int,
+                    help='The number of matrix panels daisy-chained together.')
+    parser.add_argument('--parallel', default=1, type=int,
+                    help='The number of matrix chains driven in parallel.')
+    parser.add_argument('--panel-columns', type=int,
+                    help='The number of panels per row of the display; each chain is '
+                         'folded into rows of this many panels.')
+    parser.add_argument('--serpentine', action='store_true',
+                    help='Every other row of panels runs right to left, upside down.')
+
+
+def create_sink(args, **options):
+    # Returns the sink selected by |args| and the size of its canvas.
+    default = (32, 32)
+    if args.sink == 'matrix':
+        layout = PanelLayout(args.panel_rows, args.panel_cols, args.chain,
+                             args.parallel, args.panel_columns, args.serpentine)
+        default = layout.size()
+        options['layout'] = layout
+
+    dimensions = (args.width or args.number or default[0],
+                  args.height or args.number or default[1])
+    return load_class(SINKS[args.sink])(dimensions, **options), dimensions
+
+
 def parse_args():
     parser = argparse.ArgumentParser(description='PixelFrame application')
-    parser.add_argument('-s', '--sink', default='matrix', choices=['matrix', 'image', 'gui', 'dummy'],
+    parser.add_argument('-s', '--sink', default='matrix', choices=sorted(SINKS),
                     help='The type of render sink to use.')
-    parser.add_argument('-n', '--number', default=32, type=int,
-                    help='The number of pixels (squared) making up the display.')
+    add_display_arguments(parser)
     parser.add_argument('-q', '--scale', default=1, type=int,
                     help='The number of pixels (squared) representing a single virtual pixel.')
+    parser.add_argument('-f', '--fps', default=DEFAULT_FPS, type=int,
+                    help='The maximum number of frames drawn per second.')
+    parser.add_argument('-p', '--plugins', default=['cast', 'weather'], nargs='*',
+                    choices=sorted(PLUGINS),
+                    help='The plugins to load, in drawing order.')
+    parser.add_argument('--gamma', default=1.0, type=float,
+                    help='The gamma correction applied to every frame; LED panels '
+                         'typically look best around 2.2.')
+    parser.add_argument('--balance', default=[1.0, 1.0, 1.0], type=float, nargs=3,
+                    metavar=('RED', 'GREEN', 'BLUE'),
+                    help='The gain of each color channel.')
+    parser.add_argument('--brightness', default=1.0, type=float,
+                    help='The brightness of the panel from 0.0 to 1.0.')
+    parser.add_argument('--dither', action='store_true',
+                    help='Temporally dither to show gradients at low brightness.')
+    parser.add_argument('-t', '--transition', default=FADE, choices=TRANSITIONS,
+                    help='How a new background replaces the previous one.')
+    parser.add_argument('--profile', action='store_true',
+                    help='Periodically log per-stage frame timings.')
+    parser.add_argument('--peers', default=['localhost:7777'], nargs='+',
+                    help='The host:port of each receiver fed by the network sink.')
+    parser.add_argument('--record',
+                    help='Also record frames to this .gif/.png animation or raw ring file.')
     return parser.parse_args()
 
 
 def main():
+    timer = StartupTimer()
     args = parse_args()
 
-    dimensions = (args.number, args.number)
+    options = {'peers': args.peers} if args.sink == 'network' else {}
+    sink, dimensions = create_sink(args, **options)
+    if args.record:
+        sink = RecordingSink(dimensions, args.record, sink=sink)
+    timer.phase('sink setup')
+
+    metrics = Metrics() if args.profile else NULL_METRICS
+    color = ColorPipeline(args.gamma, args.balance, args.brightness, args.dither)
+    instance = PixelFrame(sink, fps=args.fps, metrics=metrics,
+                          transition=args.transition, scale=args.scale,
+                          color=color)
+    if not instance.wait_for_first_frame(FIRST_FRAME_TIMEOUT):
+        print('Startup: no frame after %.0f s, continuing' % FIRST_FRAME_TIMEOUT)
+    timer.phase('first frame')
 
-    if args.sink == 'matrix':
-        from renderer.matrix_sink import MatrixSink
-        sink = MatrixSink(dimensions)
-    elif args.sink == 'image':
-        from renderer.image_sink import ImageSink
-        sink = ImageSink(dimensions)
-    elif args.sink == 'gui':
-        from renderer.tk_sink import TkSink
-        sink = TkSink(dimensions)
-    elif args.sink == 'dummy':
-        from renderer.renderer import RendererSink
-        sink = RendererSink(dimensions)
-
-    instance = PixelFrame(sink, scale=args.scale)
     instance.set_background_url(url)
-    instance.add_plugin(CastPlugin())
-    instance.add_plugin(WeatherPlugin())
-    
+    instance.add_plugins([
+        (name, lambda name=name: load_class(PLUGINS[name])())
+        for name in args.plugins])
+    timer.phase('plugin setup')
+
     sink.start()
     instance.shutdown()
 
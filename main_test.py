@@ -0,0 +1,81 @@
+from main import PixelFrame
+from renderer.renderer import RendererSink
+
+import threading
+import time
+import unittest
+
+
+class FakePlugin:
+    def __init__(self):
+        self.layer = None
+        self.set_up = threading.Event()
+
+    def setup_plugin(self, instance, layer):
+        self.layer = layer
+        self.set_up.set()
+
+    def update(self):
+        pass
+
+
+class AddPluginsTest(unittest.TestCase):
+    def setUp(self):
+        self.frame = PixelFrame(RendererSink((32, 32)))
+        self.addCleanup(self.frame.shutdown)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def slow_factory(self, plugin):
+        def create():
+            self.release.wait(5)
+            return plugin
+        return create
+
+    def test_returns_by_the_deadline(self):
+        slow = FakePlugin()
+        fast = FakePlugin()
+
+        start = time.monotonic()
+        self.frame.add_plugins([('slow', self.slow_factory(slow)),
+                                ('fast', lambda: fast)], deadline=0.2)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+        self.assertTrue(fast.set_up.wait(5))
+        self.assertFalse(slow.set_up.is_set())
+
+        # The slow plugin still finishes in the background.
+        self.release.set()
+        self.assertTrue(slow.set_up.wait(5))
+
+    def test_layers_keep_the_declared_order(self):
+        plugins = [FakePlugin() for _ in range(3)]
+        self.release.set()
+        self.frame.add_plugins([
+            ('first', self.slow_factory(plugins[0])),
+            ('second', lambda: plugins[1]),
+            ('third', lambda: plugins[2]),
+        ])
+
+        for plugin in plugins:
+            self.assertTrue(plugin.set_up.wait(5))
+        names = [layer.name for layer in self.frame._renderer._layers]
+        self.assertEqual(names[-3:], ['first', 'second', 'third'])
+        self.assertEqual([plugin.layer.name for plugin in plugins],
+                         ['first', 'second', 'third'])
+
+    def test_failing_plugin_does_not_stop_the_others(self):
+        def fail():
+            raise Exception('no network')
+
+        before, after = FakePlugin(), FakePlugin()
+        self.frame.add_plugins([('before', lambda: before), ('broken', fail),
+                                ('after', lambda: after)])
+
+        self.assertTrue(before.set_up.wait(5))
+        self.assertTrue(after.set_up.wait(5))
+        self.assertNotIn(None, [before.layer, after.layer])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+from PIL import Image
+
+import collections
+import contextlib
+import hashlib
+import os
+import tempfile
+import threading
+
+CACHE_DIRECTORY = '/tmp/pixelframe_art'
+MEMORY_BUDGET_BYTES = 2 * 1024 * 1024
+DISK_BUDGET_BYTES = 16 * 1024 * 1024
+
+
+class ArtCache:
+    def __init__(self, size, directory=CACHE_DIRECTORY,
+                 memory_budget=MEMORY_BUDGET_BYTES, disk_budget=DISK_BUDGET_BYTES):
+        self._size = size
+        self._directory = directory
+        self._memory_budget = memory_budget
+        self._disk_budget = disk_budget
+
+        self._lock = threading.Lock()
+        self._memory = collections.OrderedDict()
+        self._memory_bytes = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url):
+        # Entries hold panel ready frames so the panel size is part of the key.
+        digest = hashlib.sha1(url.encode('UTF-8')).hexdigest()
+        return os.path.join(
+            self._directory, '{}_{}x{}.png'.format(digest, *self._size))
+
+    def get_memory(self, url):
+        with self._lock:
+            image = self._memory.get(url)
+            if image:
+                self._memory.move_to_end(url)
+            return image
+
+    def get(self, url):
+        image = self.get_memory(url)
+        if image:
+            return image
+
+        path = self._path(url)
+        try:
+            with open(path, 'rb') as file:
+                image = Image.open(file)
+                image.load()
+            # Touching the file keeps recently used entries from eviction.
+            os.utime(path)
+        except Exception:
+            # Treat missing and corrupted entries as a cache miss.
+            return None
+
+        self._put_memory(url, image)
+        return image
+
+    def put(self, url, image):
+        self._put_memory(url, image)
+        self._put_disk(url, image)
+
+    def _put_memory(self, url, image):
+        with self._lock:
+            if url in self._memory:
+                self._memory_bytes -= self._image_bytes(self._memory.pop(url))
+
+            self._memory[url] = image
+            self._memory_bytes += self._image_bytes(image)
+
+            while self._memory_bytes > self._memory_budget and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= self._image_bytes(evicted)
+
+    def _put_disk(self, url, image):
+        temp_path = None
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self._directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as file:
+                image.save(file, 'PNG', optimize=True)
+            os.replace(temp_path, self._path(url))
+        except Exception as e:
+            print('Failed to cache album art %s: %s' % (url, e))
+            # A partial file would otherwise count against the disk budget.
+            if temp_path:
+                with contextlib.suppress(OSError):
+                    os.remove(temp_path)
+            return
+
+        self._evict_disk()
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self._directory):
+            path = os.path.join(self._directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self._disk_budget:
+                break
+
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def _image_bytes(self, image):
+        width, height = image.size
+        return width * height * len(image.getbands())
@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from PIL import Image
+from renderer.renderer import center_crop
+
+import threading
+
+MAX_ART_BYTES = 4 * 1024 * 1024
+CHUNK_SIZE = 16 * 1024
+
+
+class Superseded(Exception):
+    pass
+
+
+class ArtLoader:
+    def __init__(self, size, on_loaded, cache=None, workers=2,
+                 timeout=None, max_bytes=MAX_ART_BYTES):
+        self._size = size
+        self._on_loaded = on_loaded
+        self._cache = cache
+        self._timeout = timeout
+        self._max_bytes = max_bytes
+
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        # Publishes are serialized on their own lock so load() never waits
+        # for |on_loaded| while art is never published out of order.
+        self._publish_lock = threading.Lock()
+        self._generation = 0
+        self._future = None
+
+    def load(self, url):
+        # Only the most recently requested URL is ever published; older
+        # requests are cancelled or abandoned at the next checkpoint.
+        with self._lock:
+            self._generation += 1
+            if self._future:
+                self._future.cancel()
+
+            # Recently shown art skips the fetch but is still published from
+            # a worker so the caller never runs |on_loaded| itself.
+            image = self._cache.get_memory(url) if self._cache else None
+            if image:
+                self._future = self._executor.submit(
+                    self._publish, image, self._generation)
+                return
+
+            self._future = self._executor.submit(
+                self._load, url, self._generation)
+
+    def shutdown(self):
+        with self._lock:
+            self._generation += 1
+        self._executor.shutdown(wait=False)
+
+    def _check_current(self, generation):
+        if generation != self._generation:
+            raise Superseded()
+
+    def _load(self, url, generation):
+        try:
+            image = self._cache.get(url) if self._cache else None
+            if not image:
+                image = self._decode(self._fetch(url, generation))
+                if self._cache:
+                    self._cache.put(url, image)
+
+            self._publish(image, generation)
+        except Superseded:
+            pass
+        except Exception as e:
+            print('Failed to load album art %s: %s' % (url, e))
+
+    def _publish(self, image, generation):
+        with self._publish_lock:
+            with self._lock:
+                if generation != self._generation:
+                    return
+            self._on_loaded(image)
+
+    def _fetch(self, url, generation):
+        # Imported here as requests is slow to import and is not needed to
+        # draw the first frame.
+        from net.http import shared_client
+
+        # Without a |timeout| the shared client's default applies.
+        with shared_client().get(
+                url, stream=True, timeout=self._timeout) as response:
+            response.raise_for_status()
+
+            length = response.headers.get('Content-Length')
+            if length and int(length) > self._max_bytes:
+                raise Exception('{} bytes exceeds the size limit.'.format(length))
+
+            body = bytearray()
+            for chunk in response.iter_content(CHUNK_SIZE):
+                self._check_current(generation)
+                body.extend(chunk)
+                if len(body) > self._max_bytes:
+                    raise Exception('Response exceeds the size limit.')
+        return bytes(body)
+
+    def _decode(self, body):
+        image = Image.open(BytesIO(body))
+        # JPEGs can be decoded at a reduced scale which is still at least as
+        # large as the panel, skipping most of the decode work.
+        image.draft('RGB', self._size)
+        image = center_crop(image, self._size).convert('RGB')
+        return image.resize(self._size)
@@ -0,0 +1,50 @@
+from fakes import FakeClock
+from renderer.metrics import Metrics, NULL_METRICS
+from renderer.renderer import Renderer, RendererSink
+
+import unittest
+
+
+class MetricsTest(unittest.TestCase):
+    def test_stages_are_summarized_and_dumped(self):
+        clock, logged = FakeClock(), []
+        metrics = Metrics(dump_interval=1.0, clock=clock, log=logged.append)
+
+        for duration in (0.001, 0.002, 0.010):
+            with metrics.stage('sink'):
+                clock.now += duration
+            metrics.count('dropped_frames')
+            metrics.frame()
+
+        summary = metrics.snapshot()['stages']['sink']
+        self.assertEqual(summary['count'], 3)
+        self.assertAlmostEqual(summary['p50'], 0.002)
+        self.assertAlmostEqual(summary['max'], 0.010)
+        self.assertEqual(logged, [])
+
+        clock.now += 1.0
+        metrics.frame()
+        self.assertEqual(len(logged), 1)
+        self.assertIn('dropped_frames=3', logged[0])
+        self.assertIn('sink', logged[0])
+
+    def test_renderer_records_render_stages(self):
+        metrics = Metrics(dump_interval=1e9)
+        renderer = Renderer(RendererSink((8, 8)), metrics=metrics)
+        renderer.add_layer('clock', lambda layer: layer.putpixel((1, 1), (9, 9, 9)))
+        renderer.render()
+        renderer.render()
+
+        stages = metrics.snapshot()['stages']
+        self.assertEqual(stages['paint.clock']['count'], 1)
+        self.assertEqual(stages['sink']['count'], 1)
+        self.assertEqual(metrics.snapshot()['counters'], {'unchanged_frames': 1})
+
+    def test_null_metrics_do_nothing(self):
+        with NULL_METRICS.stage('frame'):
+            NULL_METRICS.count('dropped_frames')
+            NULL_METRICS.frame()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+from requests.adapters import HTTPAdapter
+
+import collections
+import requests
+import threading
+
+# (connect, read) timeouts in seconds.
+DEFAULT_TIMEOUT = (3.05, 10)
+POOL_SIZE = 4
+VALIDATOR_CACHE_SIZE = 32
+
+
+class HttpClient:
+    def __init__(self, timeout=DEFAULT_TIMEOUT, pool_size=POOL_SIZE, hooks=()):
+        self._timeout = timeout
+        self._hooks = list(hooks)
+
+        # Connections are kept alive and reused per host. requests asks for
+        # and transparently decodes gzip responses.
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._validated = collections.OrderedDict()
+
+    def add_hook(self, hook):
+        # Hooks are called as hook(method, url, params, headers) before every
+        # request and may add or change |headers|.
+        self._hooks.append(hook)
+
+    def get(self, url, params=None, headers=None, hooks=(), stream=False,
+            timeout=None):
+        params = dict(params or {})
+        headers = dict(headers or {})
+        for hook in self._hooks + list(hooks):
+            hook('GET', url, params, headers)
+
+        return self._session.get(url, params=params, headers=headers,
+                                 stream=stream,
+                                 timeout=timeout or self._timeout)
+
+    def get_content(self, url, params=None, headers=None, hooks=()):
+        # Sends the validators from the last response for this URL so an
+        # unchanged resource costs a 304 instead of a full body.
+        key = (url, tuple(sorted((params or {}).items())))
+        with self._lock:
+            cached = self._validated.get(key)
+
+        headers = dict(headers or {})
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        response = self.get(url, params, headers, hooks)
+        if response.status_code == 304 and cached:
+            return cached[2]
+
+        response.raise_for_status()
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            with self._lock:
+                self._validated[key] = (etag, last_modified, response.content)
+                self._validated.move_to_end(key)
+                if len(self._validated) > VALIDATOR_CACHE_SIZE:
+                    self._validated.popitem(last=False)
+
+        return response.content
+
+    def close(self):
+        self._session.close()
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def shared_client():
+    global _shared_client
+    with _shared_client_lock:
+        if not _shared_client:
+            _shared_client = HttpClient()
+        return _shared_client
@@ -0,0 +1,133 @@
+from fakes import CaptureSink
+from renderer.network_sink import DELTA, KEYFRAME, FrameDecoder, \
+    FrameEncoder, FrameReceiver, HEADER, NetworkSink, changed_spans
+
+import numpy as np
+import threading
+import unittest
+
+SIZE = (8, 4)
+
+
+def blank():
+    return np.zeros((SIZE[1], SIZE[0], 3), dtype=np.uint8)
+
+
+def split(message):
+    header = HEADER.unpack_from(message)
+    return header[1:5] + (message[HEADER.size:],)
+
+
+class ReceivingSink(CaptureSink):
+    # Frames arrive on the receiver's thread, so tests wait for them.
+    def __init__(self):
+        CaptureSink.__init__(self, SIZE)
+        self.received = threading.Condition()
+
+    def push_frame(self, frame, dirty=None):
+        with self.received:
+            CaptureSink.push_frame(self, frame, dirty)
+            self.received.notify_all()
+
+    def wait_for(self, predicate, timeout=5):
+        with self.received:
+            return self.received.wait_for(
+                lambda: predicate(self.frames), timeout)
+
+
+class EncodingTest(unittest.TestCase):
+    def test_changed_spans(self):
+        frame = blank()
+        frame[1, 2:5] = 9
+        frame[3, 0] = 1
+        frame[3, 7] = 1
+        self.assertEqual(list(changed_spans(blank(), frame)),
+                         [(1, 2, 5), (3, 0, 1), (3, 7, 8)])
+
+    def test_keyframe_then_delta(self):
+        encoder = FrameEncoder(SIZE)
+        decoder = FrameDecoder(SIZE)
+
+        frame = blank()
+        frame[:] = 7
+        message = encoder.encode(1, frame)
+        self.assertEqual(split(message)[0], KEYFRAME)
+        self.assertIsNone(decoder.decode(*split(message)))
+
+        changed = frame.copy()
+        changed[2, 3] = (1, 2, 3)
+        message = encoder.encode(2, changed)
+        self.assertEqual(split(message)[0], DELTA)
+        self.assertLess(len(message), changed.nbytes)
+        self.assertEqual(decoder.decode(*split(message)), [(3, 2, 4, 3)])
+        np.testing.assert_array_equal(decoder.frame, changed)
+
+        self.assertIsNone(encoder.encode(3, changed))
+
+    def test_periodic_keyframes(self):
+        encoder = FrameEncoder(SIZE, keyframe_interval=2)
+        kinds = []
+        for value in range(5):
+            frame = blank()
+            frame[0, 0] = value
+            kinds.append(split(encoder.encode(value, frame))[0])
+        self.assertEqual(kinds, [KEYFRAME, DELTA, DELTA, KEYFRAME, DELTA])
+
+    def test_ignores_deltas_before_keyframe(self):
+        encoder = FrameEncoder(SIZE)
+        encoder.encode(1, blank())
+        frame = blank()
+        frame[0, 0] = 1
+
+        decoder = FrameDecoder(SIZE)
+        self.assertEqual(decoder.decode(*split(encoder.encode(2, frame))), [])
+
+    def test_counts_sequence_gaps(self):
+        encoder = FrameEncoder(SIZE)
+        decoder = FrameDecoder(SIZE)
+        for sequence in (1, 2, 5):
+            frame = blank()
+            frame[0, 0] = sequence
+            decoder.decode(*split(encoder.encode(sequence, frame)))
+        self.assertEqual(decoder.dropped_frames, 2)
+
+    def test_rejects_mismatched_size(self):
+        message = FrameEncoder(SIZE).encode(1, blank())
+        with self.assertRaises(Exception):
+            FrameDecoder((4, 4)).decode(*split(message))
+
+
+class EndToEndTest(unittest.TestCase):
+    def test_streams_to_several_receivers(self):
+        panels = [ReceivingSink(), ReceivingSink()]
+        receivers = [FrameReceiver(panel, port=0, host='localhost')
+                     for panel in panels]
+        for receiver in receivers:
+            receiver.start()
+
+        sink = NetworkSink(SIZE, peers=['localhost:%d' % receiver.address[1]
+                                        for receiver in receivers])
+        try:
+            first = blank()
+            first[:] = 50
+            sink.push_frame(first)
+            for panel in panels:
+                self.assertTrue(panel.wait_for(lambda frames: frames))
+
+            second = first.copy()
+            second[1, 1] = (255, 0, 0)
+            sink.push_frame(second.tobytes(), [(1, 1, 2, 2)])
+            for panel in panels:
+                self.assertTrue(panel.wait_for(lambda frames: len(frames) == 2))
+                np.testing.assert_array_equal(panel.frames[0], first)
+                self.assertIsNone(panel.pushes[0])
+                np.testing.assert_array_equal(panel.frames[1], second)
+                self.assertEqual(panel.pushes[1], [(1, 1, 2, 2)])
+        finally:
+            sink.close()
+            for receiver in receivers:
+                receiver.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
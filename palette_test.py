@@ -0,0 +1,71 @@
+from PIL import Image
+
+from fakes import CaptureSink
+from renderer.palette import Palette
+from renderer.renderer import Anchor, Renderer
+
+import numpy as np
+import unittest
+from unittest import mock
+
+
+def random_frame(width=20, height=12, seed=0):
+    return np.random.RandomState(seed).randint(
+        0, 256, (height, width, 3)).astype(np.uint8)
+
+
+class PaletteTest(unittest.TestCase):
+    def test_average_matches_the_region_mean(self):
+        frame = random_frame()
+        palette = Palette(frame)
+        for left, top, right, bottom in [(0, 0, 20, 12), (3, 2, 9, 7), (19, 11, 20, 12)]:
+            region = frame[top:bottom, left:right].reshape(-1, 3).astype(np.int64)
+            expected = tuple(int(value) for value in
+                             region.sum(axis=0) // len(region))
+            self.assertEqual(palette.average(left, top, right, bottom), expected)
+
+    def test_average_is_clipped_and_dimmed(self):
+        palette = Palette(np.full((4, 4, 3), 200, dtype=np.uint8))
+        self.assertEqual(palette.average(-5, -5, 2, 2), (200, 200, 200))
+        self.assertEqual(palette.average(0, 0, 4, 4, brightness=0.5), (100, 100, 100))
+        self.assertEqual(palette.average(6, 6, 9, 9), (0, 0, 0))
+
+
+class PaletteRendererTest(unittest.TestCase):
+    def setUp(self):
+        self.image = Image.fromarray(random_frame(32, 32, seed=4), 'RGB')
+
+    def draw(self, renderer, palette):
+        background = renderer.add_layer('background', scale=1)
+        background.draw_image(self.image, 0.35, palette)
+        return renderer.add_layer('clock')
+
+    def test_auto_color_uses_the_palette(self):
+        slow = Renderer(CaptureSink((32, 32)), scale=2)
+        self.draw(slow, None).draw_string('1:23', anchor=Anchor.TOP | Anchor.LEFT)
+        slow.render()
+
+        fast = Renderer(CaptureSink((32, 32)), scale=2)
+        palette = Palette(fast.image_frame(self.image))
+        clock = self.draw(fast, palette)
+        with mock.patch.object(fast, '_backdrop') as backdrop:
+            clock.draw_string('1:23', anchor=Anchor.TOP | Anchor.LEFT)
+        backdrop.assert_not_called()
+        fast.render()
+
+        np.testing.assert_array_equal(fast._sink.frames[-1], slow._sink.frames[-1])
+
+    def test_overlapping_pixels_fall_back_to_compositing(self):
+        renderer = Renderer(CaptureSink((32, 32)))
+        palette = Palette(renderer.image_frame(self.image))
+        clock = self.draw(renderer, palette)
+        renderer.add_layer('marker', scale=1).putpixel((2, 2), (255, 255, 255))
+        weather = renderer.add_layer('weather')
+
+        self.assertIsNone(renderer._backdrop_average(weather, (1, 1, 10, 6)))
+        self.assertIsNotNone(renderer._backdrop_average(weather, (10, 10, 20, 16)))
+        self.assertIsNotNone(renderer._backdrop_average(clock, (1, 1, 10, 6)))
+
+
+if __name__ == '__main__':
+    unittest.main()
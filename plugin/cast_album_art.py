@@ -1,9 +1,36 @@
+from pychromecast.controllers.media import MediaController
+from pychromecast.discovery import CastListener
+from pychromecast.error import ChromecastConnectionError
+
 import pychromecast
+import threading
+import zeroconf
+
+CAST_SERVICE_TYPE = '_googlecast._tcp.local.'
+# Unreachable devices are given up on instead of being retried forever.
+CONNECT_TRIES = 3
+CONNECT_TIMEOUT_SECONDS = 10.0
+CONNECT_RETRY_SECONDS = 5.0
+
+
+class DiscoveryListener(CastListener):
+    def __init__(self, add_callback, remove_callback):
+        CastListener.__init__(self, add_callback)
+        self._remove_callback = remove_callback
+
+    def remove_service(self, zconf, typ, name):
+        CastListener.remove_service(self, zconf, typ, name)
+        self._remove_callback(name)
+
+    def update_service(self, zconf, typ, name):
+        pass
 
 
 class CastPlugin:
     def __init__(self):
-        self._controller = None
+        self._browser = None
+        self._casts = {}
+        self._lock = threading.Lock()
         self._current_image_url = None
         self._instance = None
 
@@ -11,15 +38,66 @@ class CastPlugin:
         print('Setting up CastPlugin...')
 
         self._instance = instance
-        self._add_listener()
+        self._start_discovery()
+
+    def _start_discovery(self):
+        # Devices are attached and dropped as zeroconf sees them come and go;
+        # the browser runs on its own thread so setup returns immediately.
+        self._listener = DiscoveryListener(self._add_cast, self._remove_cast)
+        self._browser = zeroconf.ServiceBrowser(
+            zeroconf.Zeroconf(), CAST_SERVICE_TYPE, self._listener)
+
+    def _add_cast(self, name):
+        service = self._listener.services.get(name)
+        if not service:
+            return
+
+        # Connecting blocks, so it must not hold up the zeroconf browser.
+        threading.Thread(target=self._connect_cast, args=(name, service),
+                         daemon=True).start()
+
+    def _connect_cast(self, name, service):
+        try:
+            cast = pychromecast._get_chromecast_from_host(
+                service, tries=CONNECT_TRIES, timeout=CONNECT_TIMEOUT_SECONDS,
+                retry_wait=CONNECT_RETRY_SECONDS, blocking=False)
+        except ChromecastConnectionError as e:
+            print('Unable to connect to %s: %s' % (name, e))
+            return
+
+        controller = MediaController()
+        controller.register_status_listener(self)
+        cast.register_handler(controller)
+        # A non-blocking Chromecast does not read its socket until the socket
+        # client thread is started.
+        cast.socket_client.start()
+
+        with self._lock:
+            previous = self._casts.pop(name, None)
+            self._casts[name] = cast
+
+        if previous:
+            previous.disconnect(blocking=False)
+        print('Adding listener: %s' % (cast.device.friendly_name))
+
+    def _remove_cast(self, name):
+        with self._lock:
+            cast = self._casts.pop(name, None)
+
+        if cast:
+            print('Removing listener: %s' % (cast.device.friendly_name))
+            cast.disconnect(blocking=False)
+
+    def shutdown(self):
+        if self._browser:
+            self._browser.zc.close()
 
-    def _add_listener(self):
-        self._controller = pychromecast.controllers.media.MediaController()
-        self._controller.register_status_listener(self)
+        with self._lock:
+            casts = list(self._casts.values())
+            self._casts.clear()
 
-        for cast in pychromecast.get_chromecasts():
-            print('Adding listener: %s' % (cast.device.friendly_name))
-            cast.register_handler(self._controller)
+        for cast in casts:
+            cast.disconnect(blocking=False)
 
     def new_media_status(self, status):
         image_size = None
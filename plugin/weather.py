@@ -4,13 +4,17 @@ import datetime
 import hmac
 import hashlib
 import json
+import os
+import random
+import tempfile
+import threading
 import time
 import uuid
 
 import urllib.parse
-import urllib.request
 
 from asset.icon import RAIN, STORM, SUN
+from net.http import shared_client
 from renderer.renderer import Anchor
 
 
@@ -19,32 +23,21 @@ CLIENT_SECRET_PATH = 'yahoo_client_secret.json'
 
 CACHE_FILEPATH = ('/tmp/weather_{}.data')
 SHOULD_REFRESH_SECONDS = 60 * 60
+REFRESH_JITTER_SECONDS = 5 * 60
+INITIAL_BACKOFF_SECONDS = 30
+MAX_BACKOFF_SECONDS = SHOULD_REFRESH_SECONDS
 
-class WeatherFetcher:
-  def __init__(self):
-    self._load_client_secret()
-
-  def fetch(self, zipcode):
-    query_params = self._generate_query_params(zipcode)
-    oauth_header = self._generate_oauth_header(query_params)
+ZIPCODE = 94040
 
-    url = API_URL + '?' +urllib.parse.urlencode(query_params)
-    request = urllib.request.Request(url)
-    request.add_header('Authorization', oauth_header)
-    request.add_header('Yahoo-App-Id', self._client_secret['app_id'])
-    return json.loads(urllib.request.urlopen(request).read())
+class OAuthHook:
+  def __init__(self, client_secret):
+    self._client_secret = client_secret
 
-  def _load_client_secret(self):
-    with open(CLIENT_SECRET_PATH, 'r') as file:
-      self._client_secret = json.loads(file.read())
-
-  def _generate_query_params(self, zipcode):
-    return {
-        'location': zipcode,
-        'format': 'json'
-    }
+  def __call__(self, method, url, params, headers):
+    headers['Authorization'] = self._generate_oauth_header(method, url, params)
+    headers['Yahoo-App-Id'] = self._client_secret['app_id']
 
-  def _generate_oauth_header(self, query_params):
+  def _generate_oauth_header(self, method, url, query_params):
     oauth_params = {
         'oauth_consumer_key': self._client_secret['key'],
         'oauth_nonce': uuid.uuid4().hex,
@@ -62,8 +55,8 @@ class WeatherFetcher:
     sorted_param_str = urllib.parse.urlencode(
         [(key, merged_params[key]) for key in sorted(merged_params)])
 
-    signature_base =  '&'.join(('GET',
-       urllib.parse.quote(API_URL, safe=''),
+    signature_base =  '&'.join((method,
+       urllib.parse.quote(url, safe=''),
        urllib.parse.quote(sorted_param_str, safe=''))).encode('UTF-8')
 
     oauth_signature = hmac.new(
@@ -75,25 +68,66 @@ class WeatherFetcher:
         ('{}="{}"'.format(k, v) for k, v in oauth_params.items()))
 
 
+class WeatherFetcher:
+  def __init__(self, client=None):
+    self._load_client_secret()
+    self._client = client or shared_client()
+    self._oauth_hook = OAuthHook(self._client_secret)
+
+  def fetch(self, zipcode):
+    query_params = self._generate_query_params(zipcode)
+    return json.loads(self._client.get_content(
+        API_URL, query_params, hooks=[self._oauth_hook]))
+
+  def _load_client_secret(self):
+    with open(CLIENT_SECRET_PATH, 'r') as file:
+      self._client_secret = json.loads(file.read())
+
+  def _generate_query_params(self, zipcode):
+    return {
+        'location': zipcode,
+        'format': 'json'
+    }
+
+
 class CachedWeatherFetcher:
   def __init__(self):
     self._wrapped_fetched = WeatherFetcher()
+    self._lock = threading.Lock()
+    self._memory = {}
 
   def fetch(self, zipcode):
-    timestamp, data = self._read_cached_weather(zipcode)
+    timestamp, data = self.cached(zipcode)
 
     if not timestamp or self._should_refresh(timestamp):
-      print('Refreshing weather data for:', zipcode)
-      data = self._wrapped_fetched.fetch(zipcode)
+      data = self.refresh(zipcode)
 
-      with open(CACHE_FILEPATH.format(zipcode), 'w') as file:
-        file.write(json.dumps({
-          'timestamp': self._current_utc_timestamp(),
-          'data': data,
-        }))
+    return data
 
+  def cached(self, zipcode):
+    # Returns the last known (timestamp, data) without touching the network;
+    # the file is only read the first time.
+    with self._lock:
+      if zipcode not in self._memory:
+        self._memory[zipcode] = self._read_cached_weather(zipcode)
+      return self._memory[zipcode]
+
+  def refresh(self, zipcode):
+    print('Refreshing weather data for:', zipcode)
+    data = self._wrapped_fetched.fetch(zipcode)
+    timestamp = self._current_utc_timestamp()
+
+    with self._lock:
+      self._memory[zipcode] = (timestamp, data)
+    self._write_cached_weather(zipcode, timestamp, data)
     return data
 
+  def seconds_until_refresh(self, zipcode):
+    timestamp, _ = self.cached(zipcode)
+    if not timestamp:
+      return 0
+    return max(timestamp + SHOULD_REFRESH_SECONDS - self._current_utc_timestamp(), 0)
+
   def _current_utc_timestamp(self):
     utc_now = datetime.datetime.utcnow()
     return calendar.timegm(utc_now.timetuple())
@@ -111,27 +145,87 @@ class CachedWeatherFetcher:
       # Treat FileNotFound and corrupted data as no previous fetch.
       return (None, None)
 
+  def _write_cached_weather(self, zipcode, timestamp, data):
+    # Written to a temporary file and renamed so readers never see a
+    # partially written cache.
+    path = CACHE_FILEPATH.format(zipcode)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+      with os.fdopen(fd, 'w') as file:
+        file.write(json.dumps({
+          'timestamp': timestamp,
+          'data': data,
+        }))
+      os.replace(temp_path, path)
+    except Exception:
+      os.remove(temp_path)
+      raise
+
 
 class WeatherPlugin:
     def __init__(self):
         self._fetcher = CachedWeatherFetcher()
+        self._instance = None
         self._renderer = None
         self._weather = None
+        self._stop = threading.Event()
 
     def setup_plugin(self, instance, renderer):
         print('Setting up WeatherPlugin...')
 
+        self._instance = instance
         self._renderer = renderer
-        self._weather = self._fetcher.fetch(94040)
+
+        # Serve whatever was cached last, however old, and refresh it from
+        # the background thread.
+        _, self._weather = self._fetcher.cached(ZIPCODE)
+        self._renderer.invalidate()
         instance.update()
 
-    def update(self):
-        if self._weather:
-            current_temp = self._weather['current_observation']['wind']['chill']
-            current_temp_str = '{0:.0f}'.format(current_temp)
+        threading.Thread(target=self._refresh_loop, daemon=True).start()
+
+    def shutdown(self):
+        self._stop.set()
+
+    def _refresh_loop(self):
+        failures = 0
+        while True:
+            if failures:
+                delay = min(INITIAL_BACKOFF_SECONDS * 2 ** (failures - 1),
+                            MAX_BACKOFF_SECONDS)
+                delay += random.uniform(0, delay / 2)
+            else:
+                delay = self._fetcher.seconds_until_refresh(ZIPCODE)
+                if delay:
+                    delay += random.uniform(0, REFRESH_JITTER_SECONDS)
+
+            if self._stop.wait(delay):
+                return
+
+            try:
+                weather = self._fetcher.refresh(ZIPCODE)
+                failures = 0
+            except Exception as e:
+                failures += 1
+                print('Failed to refresh weather (attempt %d): %s' % (failures, e))
+                continue
+
+            changed = self._display_text(weather) != self._display_text(self._weather)
+            self._weather = weather
+            if changed:
+                self._renderer.invalidate()
+                self._instance.update()
+
+    def _display_text(self, weather):
+        if not weather:
+            return None
+
+        current_temp = weather['current_observation']['wind']['chill']
+        return '{0:.0f}'.format(current_temp)
 
+    def update(self):
+        current_temp_str = self._display_text(self._weather)
+        if current_temp_str:
             self._renderer.draw_string(current_temp_str,
                                        anchor=Anchor.BOTTOM | Anchor.RIGHT,
                                        icon=(STORM, Anchor.RIGHT))
-
-
@@ -0,0 +1,33 @@
+from main import SINKS, add_display_arguments, create_sink
+from renderer.network_sink import DEFAULT_PORT, FrameReceiver
+
+import argparse
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='PixelFrame network receiver')
+    parser.add_argument('-s', '--sink', default='matrix',
+                    choices=sorted(set(SINKS) - {'network'}),
+                    help='The type of render sink driving the local panel.')
+    add_display_arguments(parser)
+    parser.add_argument('--port', default=DEFAULT_PORT, type=int,
+                    help='The port to receive frames on.')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    sink, _ = create_sink(args)
+    receiver = FrameReceiver(sink, port=args.port)
+    receiver.start()
+    print('Listening for frames on port {}'.format(args.port))
+
+    try:
+        sink.start()
+    finally:
+        receiver.close()
+
+
+if __name__ == '__main__':
+    main()
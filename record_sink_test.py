@@ -0,0 +1,106 @@
+from PIL import Image
+from fakes import FakeClock
+from renderer.record_sink import RecordingSink, read_ring
+
+import numpy as np
+import os
+import tempfile
+import unittest
+import zlib
+
+
+def solid(value, size=(4, 3)):
+    return np.full((size[1], size[0], 3), value, dtype=np.uint8)
+
+
+class RecordingSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.clock = FakeClock(100.0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_ring_keeps_last_frames(self):
+        path = self.path('frames.ring')
+        sink = RecordingSink((4, 3), path, ring_frames=3, clock=self.clock)
+        for value in range(5):
+            self.clock.now += 1
+            sink.push_frame(solid(value))
+        sink.close()
+
+        frames = read_ring(path)
+        self.assertEqual([timestamp for timestamp, _ in frames], [103.0, 104.0, 105.0])
+        self.assertEqual([frame[0, 0, 0] for _, frame in frames], [2, 3, 4])
+        self.assertEqual(frames[0][1].shape, (3, 4, 3))
+
+    def test_skips_identical_frames(self):
+        path = self.path('frames.ring')
+        sink = RecordingSink((4, 3), path, clock=self.clock)
+        sink.push_frame(solid(1))
+        sink.push_frame(solid(1))
+        sink.push_frame(solid(2))
+        sink.close()
+
+        self.assertEqual(len(read_ring(path)), 2)
+
+    def test_applies_dirty_boxes(self):
+        path = self.path('frames.ring')
+        sink = RecordingSink((4, 3), path, clock=self.clock)
+        sink.push_frame(solid(1))
+        sink.push_frame(solid(9), dirty=[(1, 1, 2, 2)])
+        sink.close()
+
+        frame = read_ring(path)[-1][1]
+        self.assertEqual(frame[1, 1, 0], 9)
+        self.assertEqual(frame[0, 0, 0], 1)
+
+    def test_gif_frame_timings(self):
+        path = self.path('frames.gif')
+        sink = RecordingSink((4, 3), path, clock=self.clock)
+        sink.push_frame(solid(0))
+        self.clock.now += 0.5
+        sink.push_frame(solid(255))
+        self.clock.now += 0.25
+        sink.close()
+
+        image = Image.open(path)
+        durations = []
+        for index in range(image.n_frames):
+            image.seek(index)
+            durations.append(image.info['duration'])
+        self.assertEqual(durations, [500, 250])
+
+    def test_animation_memory_is_bounded(self):
+        path = self.path('frames.gif')
+        frame_bytes = len(zlib.compress(solid(200).tobytes(), 1))
+        sink = RecordingSink((4, 3), path, max_bytes=2 * frame_bytes,
+                             clock=self.clock)
+        for value in range(0, 250, 50):
+            self.clock.now += 1
+            sink.push_frame(solid(value))
+        sink.close()
+
+        image = Image.open(path)
+        self.assertEqual(image.n_frames, 2)
+        self.assertEqual(image.convert('RGB').getpixel((0, 0)), (150, 150, 150))
+
+    def test_forwards_to_wrapped_sink(self):
+        pushed = []
+
+        class Sink:
+            def push_frame(self, frame, dirty=None):
+                pushed.append(dirty)
+
+        sink = RecordingSink((4, 3), self.path('frames.ring'), sink=Sink(),
+                             clock=self.clock)
+        sink.push_frame(solid(1), dirty=[(0, 0, 1, 1)])
+        sink.close()
+        self.assertEqual(pushed, [[(0, 0, 1, 1)]])
+
+
+if __name__ == '__main__':
+    unittest.main()
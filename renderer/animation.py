@@ -0,0 +1,108 @@
+import threading
+import time
+
+
+def linear(t):
+    return t
+
+
+def ease_in(t):
+    return t * t
+
+
+def ease_out(t):
+    return 1 - (1 - t) * (1 - t)
+
+
+def ease_in_out(t):
+    if t < 0.5:
+        return 2 * t * t
+    return 1 - 2 * (1 - t) * (1 - t)
+
+
+def _interpolate(start_value, end_value, progress):
+    if isinstance(start_value, tuple):
+        return tuple(_interpolate(start, end, progress)
+                     for start, end in zip(start_value, end_value))
+    return start_value + (end_value - start_value) * progress
+
+
+class Animation:
+    def __init__(self, target, name, start_value, end_value, duration,
+                 start_time, easing=linear):
+        self.target = target
+        self.name = name
+        self.start_value = start_value
+        self.end_value = end_value
+        self.duration = duration
+        self.start_time = start_time
+        self.easing = easing
+
+    def value_at(self, now):
+        if now >= self.start_time + self.duration:
+            return self.end_value
+        if now <= self.start_time:
+            return self.start_value
+
+        progress = (now - self.start_time) / self.duration
+        return _interpolate(
+            self.start_value, self.end_value, self.easing(progress))
+
+    def is_done(self, now):
+        return now >= self.start_time + self.duration
+
+
+class Animator:
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._animations = {}
+
+    def animate(self, target, name, end_value, duration,
+                start_value=None, easing=linear, delay=0.0):
+        # Any running animation of the same property is replaced; it continues
+        # from wherever the previous animation left the value.
+        if start_value is None:
+            start_value = getattr(target, name)
+        setattr(target, name, start_value)
+
+        animation = Animation(target, name, start_value, end_value, duration,
+                              self._clock() + delay, easing)
+        with self._lock:
+            self._animations[(id(target), name)] = animation
+        return animation
+
+    def cancel(self, target, name):
+        with self._lock:
+            self._animations.pop((id(target), name), None)
+
+    def next_change(self):
+        # Returns the clock time from which some property changes, which is in
+        # the past for running animations, or None when nothing is animating.
+        with self._lock:
+            if not self._animations:
+                return None
+
+            return min(animation.start_time
+                       for animation in self._animations.values())
+
+    def step(self):
+        # Applies the current value of every animation and returns whether
+        # any property was updated.
+        now = self._clock()
+        with self._lock:
+            animations = list(self._animations.items())
+
+        changed = False
+        for key, animation in animations:
+            if now < animation.start_time:
+                continue
+
+            setattr(animation.target, animation.name, animation.value_at(now))
+            changed = True
+
+            if animation.is_done(now):
+                with self._lock:
+                    if self._animations.get(key) is animation:
+                        del self._animations[key]
+        return changed
@@ -0,0 +1,113 @@
+import numpy as np
+
+# Lookup tables hold 8.8 fixed point values so dithering can recover the
+# fraction which an 8-bit panel cannot show.
+FRACTION_BITS = 8
+BAYER_4X4 = np.array([
+    [0, 8, 2, 10],
+    [12, 4, 14, 6],
+    [3, 11, 1, 9],
+    [15, 7, 13, 5],
+], dtype=np.uint16)
+
+
+class ColorPipeline:
+    # The final stage of a frame: gamma correction, per channel color balance
+    # and a global brightness applied through 256 entry lookup tables.
+    def __init__(self, gamma=1.0, balance=(1.0, 1.0, 1.0), brightness=1.0,
+                 dither=False):
+        self._gamma = gamma
+        self._balance = tuple(balance)
+        self._brightness = brightness
+        self.dither = dither
+
+        # Bumped whenever a parameter changes so renderers know to rerun it.
+        self.version = 0
+        self._luts = None
+        self._frame = 0
+
+    @property
+    def gamma(self):
+        return self._gamma
+
+    @gamma.setter
+    def gamma(self, gamma):
+        self._update('_gamma', gamma)
+
+    @property
+    def balance(self):
+        return self._balance
+
+    @balance.setter
+    def balance(self, balance):
+        self._update('_balance', tuple(balance))
+
+    @property
+    def brightness(self):
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, brightness):
+        self._update('_brightness', brightness)
+
+    def _update(self, name, value):
+        if getattr(self, name) != value:
+            setattr(self, name, value)
+            self._luts = None
+            self.version += 1
+
+    def is_identity(self):
+        return self._gamma == 1.0 and self._brightness == 1.0 and \
+            self._balance == (1.0, 1.0, 1.0)
+
+    def dithering(self):
+        # Dithering changes the output on every frame, even a static one.
+        return self.dither and not self.is_identity()
+
+    def luts(self):
+        # Returns the fixed point (3, 256) table and the rounded 8-bit table,
+        # built only when a parameter changed.
+        if self._luts is None:
+            levels = (np.arange(256) / 255.0) ** self._gamma
+            gains = np.array(self._balance)[:, None] * self._brightness
+            scaled = np.clip(levels[None, :] * gains, 0.0, 1.0) * 255.0
+            fixed = np.round(scaled * (1 << FRACTION_BITS)).astype(np.uint16)
+            rounded = np.round(scaled).astype(np.uint8)
+            self._luts = (fixed, rounded)
+        return self._luts
+
+    def next_frame(self):
+        # Moves the dither pattern on so every pixel cycles through all of the
+        # thresholds over sixteen frames.
+        self._frame = (self._frame + 1) % BAYER_4X4.size
+
+    def _thresholds(self, rows, width):
+        dy, dx = divmod(self._frame, 4)
+        pattern = np.roll(BAYER_4X4, (dy, dx), axis=(0, 1))
+        pattern = pattern * (1 << FRACTION_BITS) // BAYER_4X4.size
+        pattern = pattern + (1 << FRACTION_BITS) // (2 * BAYER_4X4.size)
+
+        height = rows.stop - rows.start
+        pattern = np.roll(pattern, -(rows.start % 4), axis=0)
+        return np.tile(pattern, (height // 4 + 1, width // 4 + 1))[:height, :width]
+
+    def apply(self, frame, out, rows=None):
+        # Writes |frame| with every adjustment applied to |out| for the band
+        # of |rows|, or for the whole frame.
+        rows = rows or slice(0, frame.shape[0])
+        frame, out = frame[rows], out[rows]
+        fixed, rounded = self.luts()
+
+        if self.dither:
+            thresholds = self._thresholds(rows, frame.shape[1])
+            for channel in range(3):
+                value = np.take(fixed[channel], frame[..., channel])
+                value += thresholds
+                value >>= FRACTION_BITS
+                out[..., channel] = value
+        elif (rounded[0] == rounded[1]).all() and (rounded[0] == rounded[2]).all():
+            np.take(rounded[0], frame, out=out)
+        else:
+            for channel in range(3):
+                out[..., channel] = np.take(rounded[channel], frame[..., channel])
+        return out
@@ -1,5 +1,5 @@
 from PIL import Image
-from renderer.renderer import RendererSink
+from renderer.renderer import RendererSink, as_frame
 
 class ImageSink(RendererSink):
     def __init__(self, size):
@@ -8,6 +8,16 @@ class ImageSink(RendererSink):
         self._image = Image.new("RGB", size)
         self._size = size
 
+    def push_frame(self, frame, dirty=None):
+        frame = as_frame(frame, self._size)
+        if dirty is None:
+            self._image = Image.fromarray(frame, 'RGB')
+        else:
+            for left, top, right, bottom in dirty:
+                self._image.paste(Image.fromarray(
+                    frame[top:bottom, left:right], 'RGB'), (left, top))
+        self.render()
+
     def putpixel(self, position, color):
         self._image.putpixel(position, color)
 
@@ -0,0 +1,91 @@
+import numpy as np
+
+
+class PanelLayout:
+    # Describes how the panels of an RGB matrix are wired. The hardware sees
+    # |parallel| chains of |chain_length| panels of |cols|x|rows| pixels laid
+    # out side by side. Each chain is folded into |panel_columns| panels per
+    # row of the virtual canvas; with |serpentine| every other row of panels
+    # runs back from right to left and is mounted upside down.
+    def __init__(self, rows=32, cols=32, chain_length=1, parallel=1,
+                 panel_columns=None, serpentine=False):
+        panel_columns = panel_columns or chain_length
+        if chain_length % panel_columns:
+            raise Exception('A chain of {} panels cannot be folded into rows '
+                            'of {}.'.format(chain_length, panel_columns))
+
+        self.rows = rows
+        self.cols = cols
+        self.chain_length = chain_length
+        self.parallel = parallel
+        self._panel_columns = panel_columns
+        self._panel_rows = chain_length // panel_columns
+        self._serpentine = serpentine
+
+        # (virtual left, virtual top, physical left, physical top, rotated)
+        self._panels = []
+        for chain in range(parallel):
+            for index in range(chain_length):
+                row, column = divmod(index, panel_columns)
+                rotated = serpentine and row % 2 == 1
+                if rotated:
+                    column = panel_columns - 1 - column
+                self._panels.append((
+                    column * cols, (chain * self._panel_rows + row) * rows,
+                    index * cols, chain * rows, rotated))
+
+        self.identity = all(
+            (left, top) == (physical_left, physical_top) and not rotated
+            for left, top, physical_left, physical_top, rotated in self._panels)
+        self._map_y, self._map_x = self._build_map()
+
+    def size(self):
+        # The size of the virtual canvas which is rendered.
+        return (self.cols * self._panel_columns,
+                self.rows * self._panel_rows * self.parallel)
+
+    def physical_size(self):
+        return (self.cols * self.chain_length, self.rows * self.parallel)
+
+    def _build_map(self):
+        # For every physical pixel, the coordinates of its virtual pixel.
+        width, height = self.physical_size()
+        map_y = np.empty((height, width), dtype=np.intp)
+        map_x = np.empty((height, width), dtype=np.intp)
+
+        local_y, local_x = np.mgrid[0:self.rows, 0:self.cols]
+        for left, top, physical_left, physical_top, rotated in self._panels:
+            y, x = (self.rows - 1 - local_y, self.cols - 1 - local_x) \
+                if rotated else (local_y, local_x)
+            region = (slice(physical_top, physical_top + self.rows),
+                      slice(physical_left, physical_left + self.cols))
+            map_y[region] = top + y
+            map_x[region] = left + x
+        return map_y, map_x
+
+    def to_physical(self, frame):
+        if self.identity:
+            return frame
+        return frame[self._map_y, self._map_x]
+
+    def map_boxes(self, boxes):
+        # Splits virtual (left, top, right, bottom) boxes at panel edges and
+        # returns the matching boxes of the physical canvas.
+        if self.identity:
+            return list(boxes)
+
+        mapped = []
+        for box_left, box_top, box_right, box_bottom in boxes:
+            for left, top, physical_left, physical_top, rotated in self._panels:
+                l = max(box_left, left) - left
+                t = max(box_top, top) - top
+                r = min(box_right, left + self.cols) - left
+                b = min(box_bottom, top + self.rows) - top
+                if l >= r or t >= b:
+                    continue
+
+                if rotated:
+                    l, t, r, b = self.cols - r, self.rows - b, self.cols - l, self.rows - t
+                mapped.append((physical_left + l, physical_top + t,
+                               physical_left + r, physical_top + b))
+        return mapped
@@ -1,23 +1,52 @@
-from renderer.renderer import RendererSink
+from PIL import Image
+from renderer.layout import PanelLayout
+from renderer.renderer import RendererSink, as_frame
 from rgbmatrix import RGBMatrix, RGBMatrixOptions
 
 
 class MatrixSink(RendererSink):
-    def __init__(self, size):
+    def __init__(self, size, layout=None):
         RendererSink.__init__(self, size)
 
+        layout = layout or PanelLayout()
+        if layout.size() != tuple(size):
+            raise Exception('The panel layout is {}x{} but the canvas is {}x{}.'.format(
+                *layout.size(), *size))
+        self._layout = layout
+
         options = RGBMatrixOptions()
-        options.rows = 32
-        options.chain_length = 1
-        options.parallel = 1
+        options.rows = layout.rows
+        options.cols = layout.cols
+        options.chain_length = layout.chain_length
+        options.parallel = layout.parallel
         # If you have an Adafruit HAT: 'adafruit-hat'
         options.hardware_mapping = 'adafruit-hat'
 
         self._matrix = RGBMatrix(options=options)
+        # Frames are drawn offscreen and swapped in on vsync to avoid tearing.
+        self._canvas = self._matrix.CreateFrameCanvas()
+        self._previous_dirty = None
         self._size = size
 
+    def push_frame(self, frame, dirty=None):
+        frame = self._layout.to_physical(as_frame(frame, self._size))
+
+        # The offscreen canvas still holds the frame before last so it needs
+        # both the previous and the current dirty regions to catch up.
+        if dirty is None or self._previous_dirty is None:
+            self._canvas.SetImage(Image.fromarray(frame, 'RGB'))
+        else:
+            boxes = self._layout.map_boxes(self._previous_dirty + dirty)
+            for left, top, right, bottom in boxes:
+                self._canvas.SetImage(Image.fromarray(
+                    frame[top:bottom, left:right], 'RGB'), left, top)
+
+        self._previous_dirty = dirty
+        self._canvas = self._matrix.SwapOnVSync(self._canvas)
+
     def putpixel(self, position, color):
         x, y = position
+        x, y, _, _ = self._layout.map_boxes([(x, y, x + 1, y + 1)])[0]
         self._matrix.SetPixel(x, y, *color)
 
     def render(self):
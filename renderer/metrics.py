@@ -0,0 +1,127 @@
+import collections
+import time
+
+# Durations are kept for this many recent samples per stage.
+HISTOGRAM_WINDOW = 256
+DUMP_INTERVAL_SECONDS = 10.0
+
+
+class Histogram:
+    def __init__(self, window=HISTOGRAM_WINDOW):
+        self._samples = collections.deque(maxlen=window)
+
+    def add(self, value):
+        self._samples.append(value)
+
+    def summary(self):
+        samples = sorted(self._samples)
+        if not samples:
+            return None
+
+        def percentile(fraction):
+            return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+        return {
+            'count': len(samples),
+            'p50': percentile(0.5),
+            'p90': percentile(0.9),
+            'p99': percentile(0.99),
+            'max': samples[-1],
+        }
+
+
+class _Stage:
+    __slots__ = ('_metrics', '_name', '_start')
+
+    def __init__(self, metrics, name):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self):
+        self._start = self._metrics._clock()
+
+    def __exit__(self, *args):
+        self._metrics.record(self._name, self._metrics._clock() - self._start)
+
+
+class Metrics:
+    def __init__(self, dump_interval=DUMP_INTERVAL_SECONDS,
+                 clock=time.perf_counter, log=print):
+        self._dump_interval = dump_interval
+        self._clock = clock
+        self._log = log
+
+        self._histograms = collections.defaultdict(Histogram)
+        self._counters = collections.Counter()
+        self._frames = 0
+        self._last_dump = clock()
+
+    def stage(self, name):
+        # Use as 'with metrics.stage(name):' to time the enclosed block.
+        return _Stage(self, name)
+
+    def record(self, name, seconds):
+        self._histograms[name].add(seconds)
+
+    def count(self, name, amount=1):
+        if amount:
+            self._counters[name] += amount
+
+    def frame(self):
+        self._frames += 1
+
+        now = self._clock()
+        if now - self._last_dump >= self._dump_interval:
+            self._log(self.format(now - self._last_dump))
+            self._frames = 0
+            self._counters.clear()
+            self._last_dump = now
+
+    def snapshot(self):
+        return {
+            'stages': {name: histogram.summary()
+                       for name, histogram in self._histograms.items()},
+            'counters': dict(self._counters),
+            'frames': self._frames,
+        }
+
+    def format(self, elapsed):
+        lines = ['Metrics: %.1f fps over %.0f s %s' % (
+            self._frames / elapsed, elapsed,
+            ' '.join('%s=%d' % item for item in sorted(self._counters.items())))]
+        for name, histogram in sorted(self._histograms.items()):
+            summary = histogram.summary()
+            lines.append('  %-24s p50 %7.2f ms  p90 %7.2f ms  max %7.2f ms' % (
+                name, summary['p50'] * 1000, summary['p90'] * 1000,
+                summary['max'] * 1000))
+        return '\n'.join(lines)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *args):
+        pass
+
+
+class NullMetrics:
+    # Stands in for Metrics when profiling is off; every call is a no-op.
+    _stage = _NullStage()
+
+    def stage(self, name):
+        return self._stage
+
+    def record(self, name, seconds):
+        pass
+
+    def count(self, name, amount=1):
+        pass
+
+    def frame(self):
+        pass
+
+
+NULL_METRICS = NullMetrics()
@@ -0,0 +1,334 @@
+from renderer.renderer import RendererSink, as_frame, dirty_boxes
+
+import numpy as np
+import socket
+import struct
+import threading
+import zlib
+
+DEFAULT_PORT = 7777
+# A keyframe is sent at least this often so the stream self-heals.
+KEYFRAME_INTERVAL = 300
+CONNECT_TIMEOUT_SECONDS = 3.0
+SEND_TIMEOUT_SECONDS = 5.0
+INITIAL_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+
+MAGIC = b'PFNS'
+KEYFRAME = 0
+DELTA = 1
+# magic, kind, sequence, width, height, payload length.
+HEADER = struct.Struct('<4sBIHHI')
+# row, column, length in pixels; followed by the RGB bytes of the span.
+SPAN = struct.Struct('<HHH')
+SEQUENCE_MASK = 0xFFFFFFFF
+
+
+def changed_spans(previous, frame):
+    # Returns the (row, start, end) runs of pixels which differ between the
+    # two frames in row-major order.
+    changed = (previous != frame).any(axis=2)
+    padded = np.zeros((changed.shape[0], changed.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = changed
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return zip(rows.tolist(), starts.tolist(), ends.tolist())
+
+
+class FrameEncoder:
+    def __init__(self, size, keyframe_interval=KEYFRAME_INTERVAL):
+        self._size = size
+        self._keyframe_interval = keyframe_interval
+        self.reset()
+
+    def reset(self):
+        # Forces the next frame to be a keyframe, e.g. after reconnecting.
+        self._previous = None
+        self._since_keyframe = 0
+
+    def encode(self, sequence, frame):
+        # Returns the message bringing a receiver from the previously encoded
+        # frame to |frame|, or None when nothing changed.
+        if self._previous is not None and \
+                self._since_keyframe < self._keyframe_interval:
+            parts = []
+            for row, start, end in changed_spans(self._previous, frame):
+                parts.append(SPAN.pack(row, start, end - start))
+                parts.append(frame[row, start:end].tobytes())
+
+            if not parts:
+                return None
+
+            delta = b''.join(parts)
+            # Deltas which touch most of the frame are sent as keyframes.
+            if len(delta) < frame.nbytes:
+                self._previous = frame
+                self._since_keyframe += 1
+                return self._message(DELTA, sequence, delta)
+
+        self._previous = frame
+        self._since_keyframe = 0
+        return self._message(KEYFRAME, sequence, frame.tobytes())
+
+    def _message(self, kind, sequence, payload):
+        payload = zlib.compress(payload)
+        width, height = self._size
+        return HEADER.pack(MAGIC, kind, sequence & SEQUENCE_MASK, width, height,
+                           len(payload)) + payload
+
+
+class FrameDecoder:
+    def __init__(self, size):
+        width, height = size
+        self._size = size
+        self.frame = np.zeros((height, width, 3), dtype=np.uint8)
+        self._sequence = None
+        self.dropped_frames = 0
+
+    def decode(self, kind, sequence, width, height, payload):
+        # Applies a message to |frame| and returns the dirty boxes, None for a
+        # full frame, or [] when the message had to be ignored.
+        if (width, height) != self._size:
+            raise Exception('Received a {}x{} frame for a {}x{} panel.'.format(
+                width, height, *self._size))
+
+        if kind == DELTA and self._sequence is None:
+            return []
+
+        if self._sequence is not None:
+            self.dropped_frames += (sequence - self._sequence - 1) & SEQUENCE_MASK
+        self._sequence = sequence
+
+        payload = zlib.decompress(payload)
+        if kind == KEYFRAME:
+            self.frame = np.frombuffer(payload, dtype=np.uint8).reshape(
+                height, width, 3).copy()
+            return None
+
+        changed = np.zeros((height, width), dtype=bool)
+        offset = 0
+        while offset < len(payload):
+            row, start, length = SPAN.unpack_from(payload, offset)
+            offset += SPAN.size
+            end = offset + length * 3
+            self.frame[row, start:start + length] = np.frombuffer(
+                payload[offset:end], dtype=np.uint8).reshape(length, 3)
+            changed[row, start:start + length] = True
+            offset = end
+        return dirty_boxes(changed)
+
+    def reset(self):
+        self._sequence = None
+
+
+def read_exactly(connection, length):
+    data = bytearray()
+    while len(data) < length:
+        chunk = connection.recv(length - len(data))
+        if not chunk:
+            return None
+        data.extend(chunk)
+    return bytes(data)
+
+
+def read_message(connection):
+    header = read_exactly(connection, HEADER.size)
+    if header is None:
+        return None
+
+    magic, kind, sequence, width, height, length = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise Exception('Received a message which is not a PixelFrame frame.')
+
+    payload = read_exactly(connection, length)
+    if payload is None:
+        return None
+    return kind, sequence, width, height, payload
+
+
+def parse_address(address):
+    host, _, port = address.rpartition(':')
+    return host or 'localhost', int(port) if port else DEFAULT_PORT
+
+
+class _Peer:
+    # Streams frames to one receiver. Only the latest frame is kept so a slow
+    # link drops frames instead of queueing them up behind the socket.
+    def __init__(self, address, size, keyframe_interval):
+        self._address = address
+        self._encoder = FrameEncoder(size, keyframe_interval)
+
+        self._condition = threading.Condition()
+        self._latest = None
+        self._pending = False
+        self._closed = False
+        self.dropped_frames = 0
+        self.sent_bytes = 0
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def offer(self, sequence, frame):
+        with self._condition:
+            if self._pending:
+                self.dropped_frames += 1
+            self._latest = (sequence, frame)
+            self._pending = True
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _take(self):
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                return None
+
+            self._pending = False
+            return self._latest
+
+    def _run(self):
+        backoff = INITIAL_BACKOFF_SECONDS
+        while True:
+            try:
+                connection = socket.create_connection(
+                    self._address, CONNECT_TIMEOUT_SECONDS)
+            except OSError as error:
+                print('Unable to connect to {}:{} ({})'.format(*self._address, error))
+            else:
+                backoff = INITIAL_BACKOFF_SECONDS
+                self._stream(connection)
+
+            with self._condition:
+                if not self._closed:
+                    self._condition.wait(backoff)
+                if self._closed:
+                    return
+            backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+
+    def _stream(self, connection):
+        # A new connection always starts from a keyframe of the latest frame.
+        self._encoder.reset()
+        with self._condition:
+            self._pending = self._latest is not None
+
+        with connection:
+            connection.settimeout(SEND_TIMEOUT_SECONDS)
+            try:
+                while True:
+                    item = self._take()
+                    if item is None:
+                        return
+
+                    message = self._encoder.encode(*item)
+                    if message:
+                        connection.sendall(message)
+                        self.sent_bytes += len(message)
+            except OSError as error:
+                print('Lost connection to {}:{} ({})'.format(*self._address, error))
+
+
+class NetworkSink(RendererSink):
+    # Streams frames over TCP to a FrameReceiver driving each remote panel.
+    def __init__(self, size, peers=('localhost:%d' % DEFAULT_PORT,),
+                 keyframe_interval=KEYFRAME_INTERVAL):
+        RendererSink.__init__(self, size)
+
+        self._sequence = 0
+        self._peers = [_Peer(parse_address(peer), size, keyframe_interval)
+                       for peer in peers]
+
+    def start(self):
+        try:
+            RendererSink.start(self)
+        finally:
+            self.close()
+
+    def push_frame(self, frame, dirty=None):
+        # Every peer diffs against the last frame it sent itself, so |dirty|
+        # is not needed here.
+        frame = as_frame(frame, self._size).copy()
+        frame.flags.writeable = False
+
+        self._sequence = (self._sequence + 1) & SEQUENCE_MASK
+        for peer in self._peers:
+            peer.offer(self._sequence, frame)
+
+    @property
+    def dropped_frames(self):
+        return sum(peer.dropped_frames for peer in self._peers)
+
+    def close(self):
+        for peer in self._peers:
+            peer.close()
+
+
+class FrameReceiver:
+    # Accepts frames from a NetworkSink and pushes them to a local |sink|.
+    def __init__(self, sink, port=DEFAULT_PORT, host=''):
+        self._sink = sink
+        self._decoder = FrameDecoder(sink.size())
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((host, port))
+        self._server.listen()
+        self._closed = False
+        self._connection = None
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.getsockname()[:2]
+
+    @property
+    def dropped_frames(self):
+        return self._decoder.dropped_frames
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def serve_forever(self):
+        while not self._closed:
+            try:
+                connection, address = self._server.accept()
+            except OSError:
+                return
+
+            print('Receiving frames from {}:{}'.format(*address))
+            self._connection = connection
+            with connection:
+                self._receive(connection)
+            self._connection = None
+
+    def _receive(self, connection):
+        self._decoder.reset()
+        try:
+            while True:
+                message = read_message(connection)
+                if message is None:
+                    return
+
+                dirty = self._decoder.decode(*message)
+                if dirty is None or dirty:
+                    self._sink.push_frame(self._decoder.frame, dirty)
+        except Exception as error:
+            print('Dropping connection: {}'.format(error))
+
+    def close(self):
+        self._closed = True
+        # Shutting the sockets down wakes up a pending accept() or recv().
+        for connection in (self._server, self._connection):
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except (AttributeError, OSError):
+                pass
+        self._server.close()
+        if self._thread:
+            self._thread.join()
@@ -0,0 +1,29 @@
+import numpy as np
+
+
+class Palette:
+    # Analysis of a background frame: a summed-area table per channel so the
+    # average of any box is four lookups.
+    def __init__(self, frame):
+        height, width = frame.shape[:2]
+        self.size = (width, height)
+
+        table = np.zeros((height + 1, width + 1, 3), dtype=np.int64)
+        np.cumsum(frame, axis=0, dtype=np.int64, out=table[1:, 1:])
+        np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+        self._table = table
+
+    def average(self, left, top, right, bottom, brightness=1.0):
+        # The mean color of the box clipped to the frame, as drawn at
+        # |brightness|.
+        width, height = self.size
+        left, right = min(max(left, 0), width), min(max(right, 0), width)
+        top, bottom = min(max(top, 0), height), min(max(bottom, 0), height)
+        if left >= right or top >= bottom:
+            return (0, 0, 0)
+
+        table = self._table
+        total = table[bottom, right] - table[top, right] - \
+            table[bottom, left] + table[top, left]
+        area = (right - left) * (bottom - top)
+        return tuple(int(value * brightness) // area for value in total.tolist())
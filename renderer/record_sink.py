@@ -0,0 +1,196 @@
+from PIL import Image
+from renderer.renderer import RendererSink, as_frame
+
+import collections
+import mmap
+import numpy as np
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+# Animated outputs keep at most this many distinct frames, and this many
+# compressed bytes of them, in memory; the oldest frames are dropped first.
+MAX_ANIMATION_FRAMES = 1000
+MAX_ANIMATION_BYTES = 32 * 1024 * 1024
+RING_FRAMES = 300
+
+RING_MAGIC = b'PFRG'
+# magic, width, height, capacity, total frames written.
+RING_HEADER = struct.Struct('<4sIIIQ')
+RING_TIMESTAMP = struct.Struct('<d')
+
+
+class RingFile:
+    def __init__(self, path, size, capacity=RING_FRAMES):
+        width, height = size
+        self._frame_bytes = width * height * 3
+        self._slot_bytes = RING_TIMESTAMP.size + self._frame_bytes
+        self._size = size
+        self._capacity = capacity
+        self._count = 0
+
+        length = RING_HEADER.size + self._slot_bytes * capacity
+        with open(path, 'wb') as file:
+            file.truncate(length)
+        self._file = open(path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), length)
+        self._write_header()
+
+    def _write_header(self):
+        RING_HEADER.pack_into(self._map, 0, RING_MAGIC, self._size[0],
+                              self._size[1], self._capacity, self._count)
+
+    def write(self, timestamp, frame):
+        # The slot is filled before the header count is bumped so a reader
+        # never sees a half written frame as valid.
+        offset = RING_HEADER.size + (self._count % self._capacity) * self._slot_bytes
+        RING_TIMESTAMP.pack_into(self._map, offset, timestamp)
+        start = offset + RING_TIMESTAMP.size
+        self._map[start:start + self._frame_bytes] = frame.tobytes()
+
+        self._count += 1
+        self._write_header()
+
+    def close(self):
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+
+
+def read_ring(path):
+    # Returns the (timestamp, frame) pairs held in a ring file, oldest first.
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    magic, width, height, capacity, count = RING_HEADER.unpack_from(data, 0)
+    if magic != RING_MAGIC:
+        raise Exception('{} is not a frame ring file.'.format(path))
+
+    frame_bytes = width * height * 3
+    slot_bytes = RING_TIMESTAMP.size + frame_bytes
+
+    frames = []
+    for index in range(max(count - capacity, 0), count):
+        offset = RING_HEADER.size + (index % capacity) * slot_bytes
+        timestamp, = RING_TIMESTAMP.unpack_from(data, offset)
+        start = offset + RING_TIMESTAMP.size
+        frame = np.frombuffer(data[start:start + frame_bytes], dtype=np.uint8)
+        frames.append((timestamp, frame.reshape(height, width, 3)))
+    return frames
+
+
+class RecordingSink(RendererSink):
+    # Records every distinct frame to |path| while forwarding frames to the
+    # wrapped |sink|, if any. '.gif' and '.png' paths are written as animations
+    # when the sink is closed, so nothing is saved if the process dies first;
+    # any other path is a memory-mapped ring of the last |ring_frames| frames
+    # which is always up to date on disk and survives a crash.
+    def __init__(self, size, path, sink=None, ring_frames=RING_FRAMES,
+                 max_frames=MAX_ANIMATION_FRAMES, max_bytes=MAX_ANIMATION_BYTES,
+                 clock=time.time):
+        RendererSink.__init__(self, size)
+
+        self._path = path
+        self._sink = sink
+        self._clock = clock
+        self._frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        self._last_recorded = None
+
+        extension = os.path.splitext(path)[1].lower()
+        self._format = {'.gif': 'GIF', '.png': 'PNG'}.get(extension)
+        self._ring = None if self._format else RingFile(path, size, ring_frames)
+        self._frames = collections.deque(maxlen=max_frames)
+        self._frame_bytes = 0
+        self._max_bytes = max_bytes
+
+        self._queue = queue.Queue()
+        self._encoder = threading.Thread(target=self._encode, daemon=True)
+        self._encoder.start()
+
+    def start(self):
+        try:
+            if self._sink:
+                self._sink.start()
+            else:
+                RendererSink.start(self)
+        finally:
+            self.close()
+
+    def push_frame(self, frame, dirty=None):
+        if self._sink:
+            self._sink.push_frame(frame, dirty)
+
+        frame = as_frame(frame, self._size)
+        for left, top, right, bottom in dirty or [(0, 0, *self._size)]:
+            self._frame[top:bottom, left:right] = frame[top:bottom, left:right]
+        self._record()
+
+    def putpixel(self, position, color):
+        if self._sink:
+            self._sink.putpixel(position, color)
+
+        x, y = position
+        self._frame[y, x] = color
+
+    def render(self):
+        if self._sink:
+            self._sink.render()
+        self._record()
+
+    def _record(self):
+        # Identical consecutive frames are skipped; the previous frame is
+        # simply held for longer.
+        if self._last_recorded is not None and np.array_equal(
+                self._frame, self._last_recorded):
+            return
+
+        self._last_recorded = self._frame.copy()
+        self._queue.put((self._clock(), self._last_recorded))
+
+    def close(self):
+        self._queue.put(None)
+        self._encoder.join()
+
+    def _encode(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            if self._ring:
+                self._ring.write(*item)
+            else:
+                self._hold(*item)
+
+        if self._ring:
+            self._ring.close()
+        else:
+            self._write_animation(self._clock())
+
+    def _hold(self, timestamp, frame):
+        # Held frames are compressed as panel content is mostly flat color.
+        if len(self._frames) == self._frames.maxlen:
+            self._frame_bytes -= len(self._frames[0][1])
+        data = zlib.compress(frame.tobytes(), 1)
+        self._frames.append((timestamp, data))
+        self._frame_bytes += len(data)
+
+        while self._frame_bytes > self._max_bytes and len(self._frames) > 1:
+            self._frame_bytes -= len(self._frames.popleft()[1])
+
+    def _write_animation(self, end_time):
+        if not self._frames:
+            return
+
+        frames = list(self._frames)
+        timestamps = [timestamp for timestamp, _ in frames] + [end_time]
+        durations = [max(int((end - start) * 1000), 10)
+                     for start, end in zip(timestamps, timestamps[1:])]
+        images = [Image.frombytes('RGB', self._size, zlib.decompress(data))
+                  for _, data in frames]
+
+        images[0].save(self._path, self._format, save_all=True,
+                       append_images=images[1:], duration=durations, loop=0)
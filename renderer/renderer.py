@@ -1,28 +1,100 @@
-from asset.font import FONT
+from asset.sprite import as_sprite
+from concurrent.futures import ThreadPoolExecutor
+from renderer.color import ColorPipeline
 from enum import IntEnum
 from PIL import Image
+from renderer.metrics import NULL_METRICS
+from renderer.text import FONT_HEIGHT, glyph_mask, text_mask
 from time import sleep
 
-import colorsys
+import collections
+import functools
 import math
+import numpy as np
+import os
 import sys
+import threading
 
+# Brightness is quantized to this many steps per 1.0 so lookup tables can be
+# shared between frames of a fade.
+BRIGHTNESS_STEPS = 1024
+IMAGE_CACHE_SIZE = 4
+# Canvases of at least this many pixels are composited and diffed in bands
+# of rows on a thread pool, one band per worker; numpy releases the GIL.
+TILE_MIN_PIXELS = 128 * 64
+MAX_TILE_WORKERS = 4
 
-def center_crop(image):
+
+def center_crop(image, size=(1, 1)):
+    # Crops the largest centered region with the aspect ratio of |size|.
     width, height = image.size
-    square = min(width, height)
-    left = (width - square) / 2
-    top = (height - square) / 2
-    right = (width + square) / 2
-    bottom = (height + square) / 2
+    aspect = size[0] / size[1]
+    crop_width = min(width, height * aspect)
+    crop_height = crop_width / aspect
+    left = (width - crop_width) / 2
+    top = (height - crop_height) / 2
+    right = (width + crop_width) / 2
+    bottom = (height + crop_height) / 2
     return image.crop((left, top, right, bottom))
 
 
-def modify_brightness(color, brightness):
-    r, g, b = color
-    hsv = colorsys.rgb_to_hsv(r / 255.0, g / 255.0, b / 255.0)
-    return tuple(int(value * 0xFF) for value in colorsys.hsv_to_rgb(
-            hsv[0], hsv[1], hsv[2] * brightness))
+def as_frame(frame, size):
+    if isinstance(frame, np.ndarray):
+        return frame
+
+    width, height = size
+    return np.frombuffer(frame, dtype=np.uint8).reshape(height, width, 3)
+
+
+def dirty_boxes(changed):
+    # Groups consecutive changed rows into bands and returns the bounding box
+    # of each band as (left, top, right, bottom).
+    rows = np.flatnonzero(changed.any(axis=1))
+    if not len(rows):
+        return []
+
+    breaks = np.flatnonzero(np.diff(rows) > 1)
+    starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+    ends = np.concatenate((rows[breaks], [rows[-1]])) + 1
+
+    boxes = []
+    for top, bottom in zip(starts.tolist(), ends.tolist()):
+        columns = np.flatnonzero(changed[top:bottom].any(axis=0))
+        boxes.append((int(columns[0]), top, int(columns[-1]) + 1, bottom))
+    return boxes
+
+
+@functools.lru_cache(maxsize=64)
+def _brightness_lut(step):
+    lut = np.arange(256, dtype=np.uint32) * step // BRIGHTNESS_STEPS
+    return np.minimum(lut, 255).astype(np.uint8)
+
+
+def brightness_lut(brightness):
+    return _brightness_lut(int(round(brightness * BRIGHTNESS_STEPS)))
+
+
+def _blend(out, rgb, alpha, opacity, scale):
+    # Layers with a scale are broadcast over views of |out| instead of being
+    # upscaled into a temporary copy.
+    if scale > 1:
+        height, width = alpha.shape
+        out = out.reshape(height, scale, width, scale, 3)
+        rgb = rgb[:, None, :, None]
+        alpha = alpha[:, None, :, None]
+
+    if opacity >= 1.0:
+        np.copyto(out, rgb, where=alpha[..., None])
+        return
+
+    alpha = alpha[..., None] * np.float32(opacity)
+    blended = out + (rgb.astype(np.float32) - out) * alpha
+    np.copyto(out, blended, casting='unsafe')
+
+
+def contrast_color(average):
+    # Each channel flips to whichever extreme is furthest from the backdrop.
+    return tuple(255 if value < 128 else 0 for value in average)
 
 
 class RendererSink:
@@ -37,6 +109,23 @@ class RendererSink:
             except KeyboardInterrupt:
                 sys.exit(0)
 
+    def push_frame(self, frame, dirty=None):
+        # Compatibility fallback for sinks which only implement putpixel().
+        # |dirty| is a list of (left, top, right, bottom) boxes which changed
+        # since the last frame, or None when the whole frame must be drawn.
+        if type(self).putpixel is not RendererSink.putpixel:
+            self._putpixels(as_frame(frame, self._size), dirty)
+
+        self.render()
+
+    def _putpixels(self, frame, dirty):
+        width, height = self._size
+        for left, top, right, bottom in dirty or [(0, 0, width, height)]:
+            rows = frame[top:bottom, left:right].tolist()
+            for y, row in enumerate(rows, top):
+                for x, color in enumerate(row, left):
+                    self.putpixel((x, y), tuple(color))
+
     def putpixel(self, position, color):
         pass
 
@@ -57,87 +146,154 @@ class Anchor(IntEnum):
     CENTER = CENTER_X | CENTER_Y
 
 
-class Renderer:
-    def __init__(self, sink, scale=1):
-        print('Renderer init(%dx%d) scale: %d' % (*sink.size(), scale))
-        print('Renderer sink: %s' % (sink.__class__.__name__))
+class Layer:
+    def __init__(self, renderer, name, paint=None, opacity=1.0, scale=1):
+        width, height = renderer.size()
+        if width % scale or height % scale:
+            raise Exception('A {}x{} window has no whole pixels of scale {}.'.format(
+                width, height, scale))
+
+        # Each pixel of the layer covers |scale| x |scale| pixels of the panel
+        # and the layer is only upscaled when it is composited.
+        self._renderer = renderer
+        self.scale = scale
+        self._scale = max(renderer._scale // scale, 1)
+        self._window_width, self._window_height = width // scale, height // scale
+
+        self.name = name
+        self.paint = paint
+        self._paint_stage = 'paint.' + name
+        self.rgb = np.zeros(
+            (self._window_height, self._window_width, 3), dtype=np.uint8)
+        self.alpha = np.zeros(
+            (self._window_height, self._window_width), dtype=bool)
+        self._opacity = opacity
+
+        # |_invalid| asks for |paint| to be run again on the next render while
+        # |_changed| records that the pixels need to be composited again.
+        self._invalid = paint is not None
+        self._changed = False
+        self._reads_backdrop = False
+        # A (palette, brightness) pair while the layer only holds an analysed
+        # image, which lets text above it pick a color without compositing.
+        self._palette = None
+        self._empty = True
+
+    @property
+    def opacity(self):
+        return self._opacity
+
+    @opacity.setter
+    def opacity(self, opacity):
+        if opacity != self._opacity:
+            self._opacity = opacity
+            self._changed = True
 
-        self._scale = scale
-        self._window_width, self._window_height = sink.size()
-        self._buffer = [
-            (0, 0, 0) for i in range(self._window_width * self._window_height)]
-        self._sink = sink
+    def size(self):
+        return (self._window_width, self._window_height)
+
+    def invalidate(self):
+        self._invalid = True
+
+    def clear(self):
+        self.rgb.fill(0)
+        self.alpha.fill(False)
+        self._changed = True
+        self._palette = None
+        self._empty = True
+
+    def _drawn(self):
+        self._changed = True
+        self._palette = None
+        self._empty = False
+
+    def _repaint(self):
+        self.clear()
+        self._invalid = False
+        self._reads_backdrop = False
+        self.paint(self)
+
+    def _draw_scale(self, scale):
+        # An explicit |scale| is in panel pixels like the renderer's scale.
+        if not scale:
+            return self._scale
+        if scale % self.scale:
+            raise Exception('Scale {} cannot be drawn on layer {} of scale {}.'.format(
+                scale, self.name, self.scale))
+        return scale // self.scale
+
+    def _blit_mask(self, x, y, mask, color):
+        # Clip the mask against the window so partially visible glyphs and
+        # bitmaps only write the pixels that land inside the buffer.
+        height, width = mask.shape
+        left, top = max(x, 0), max(y, 0)
+        right = min(x + width, self._window_width)
+        bottom = min(y + height, self._window_height)
+        if left >= right or top >= bottom:
+            return
+
+        mask = mask[top - y:bottom - y, left - x:right - x]
+        region = self.rgb[top:bottom, left:right]
+        if isinstance(color, np.ndarray) and color.ndim == 3:
+            color = color[top - y:bottom - y, left - x:right - x][mask]
+        region[mask] = color
+        self.alpha[top:bottom, left:right] |= mask
+        self._drawn()
 
     def draw_bitmap(self, bitmap, x, y):
-        data = bitmap['data']
-        width = bitmap['width']
-        height = int(len(data) / width)
-
-        def hex_to_rgb(value):
-            value = hex(value).lstrip('0x')
-            lv = len(value)
-            return tuple(int(value[i:i + lv // 3], 16) for i in range(0, lv, lv // 3))
-
-        for dx in range(width):
-            for dy in range(height):
-                value = data[dy * width + dx]
-
-                if not value:
-                    continue
-          
-                color = hex_to_rgb(bitmap['pallete'][value - 1])
-                self.putpixel((x + self._scale * dx, y + self._scale * dy), color, self._scale)
-
-    def draw_image(self, image, brightness):
-        image = center_crop(image).convert("RGB")
-        image = image.resize((self._window_width, self._window_height))
-
-        for y in range(self._window_height):
-            for x in range(self._window_width):
-                color = image.getpixel((x, y))
-                # Images should always have a scale of 1.0:
-                self.putpixel((x, y), color, brightness, scale=1)
+        sprite = as_sprite(bitmap).scaled(self._scale)
+        self._blit_mask(x, y, sprite.alpha, sprite.rgb)
+
+    def draw_image(self, image, brightness, palette=None):
+        # Images should always have a scale of 1.0. |palette| is the Palette
+        # of the image at the layer's size, if it has been analysed.
+        pixels = self._renderer._prepare_image(image, self.size())
+        if brightness == 1.0:
+            np.copyto(self.rgb, pixels)
+        else:
+            np.take(brightness_lut(brightness), pixels, out=self.rgb)
+        self.alpha.fill(True)
+        self._drawn()
+        if palette is not None and palette.size == self.size():
+            self._palette = (palette, brightness)
+
+    def draw_frame(self, frame):
+        # Copies a frame already at the layer's resolution, e.g. one step of
+        # a Transition.
+        np.copyto(self.rgb, frame)
+        self.alpha.fill(True)
+        self._drawn()
 
     def draw_char(self, char, x, y, color, scale=None):
-        font_width, font_height = FONT['font_dimens']
-        scale = scale if scale else self._scale
-
-        width = FONT[char].get('width', font_width)
-        width_offset = (font_width - width)
+        scale = self._draw_scale(scale)
 
-        for dy in range(font_height):
-            for dx in range(font_width):
-                position = (x + ((dx - width_offset) * scale), y + (dy * scale))
+        mask = glyph_mask(char, scale)
+        self._blit_mask(x, y, mask, color)
 
-                if FONT[char]['data'][dy * font_width + dx]:
-                    self.putpixel(position, color, scale)
-
-        return x + (width * scale)
+        return x + mask.shape[1]
 
     def draw_string(self, string,
                     anchor=Anchor.LEFT, color=None,
                     padding=1, spacing=1, icon=None, scale=None):
-        font_width, font_height = FONT['font_dimens']
+        font_height = FONT_HEIGHT
         bitmap, alignment = icon if icon else (None, None)
+        bitmap = as_sprite(bitmap) if bitmap else None
 
-        scale = scale if scale else self._scale
+        scale = self._draw_scale(scale)
         scaled_spacing = spacing * scale
         scaled_padding = padding * scale
 
-        def calc_length():
-            length = 0
-            for char in string:
-                length += FONT[char].get('width', font_width) + spacing
-            return (length - spacing) * scale
+        mask = text_mask(string, scale, spacing)
+        length = mask.shape[1]
 
         def calc_x():
             if anchor & Anchor.LEFT:
                 return scaled_padding
             if anchor & Anchor.RIGHT:
-                x = self._window_width - calc_length() - scaled_padding
-                return x if not bitmap else x - bitmap['width'] * scale - scaled_spacing
+                x = self._window_width - length - scaled_padding
+                return x if not bitmap else x - bitmap.width * scale - scaled_spacing
 
-            return math.ceil((self._window_width - calc_length()) / 2)
+            return math.ceil((self._window_width - length) / 2)
 
         def calc_y():
             if anchor & Anchor.TOP:
@@ -151,24 +307,28 @@ class Renderer:
         y = calc_y()
 
         if color is None:
-            total_pixels = font_height * calc_length()
-            sum_color = (0, 0, 0)
-            for dx in range(calc_length()):
-                for dy in range(font_height):
-                    cell_color = self._buffer[
-                            (dy + y) * self._window_width + (dx + x)]
-                    sum_color = tuple(
-                            sum(x) for x in zip(sum_color, cell_color))
-
-            color = tuple(int(x/total_pixels) for x in sum_color)
-            color = tuple(255 if x < 128 else 0 for x in color)
+            # The text contrasts with everything visible beneath it so this
+            # layer has to be repainted whenever a lower layer changes.
+            self._reads_backdrop = True
+            average = self._renderer._backdrop_average(
+                self, (x, y, x + length, y + font_height))
+
+            if average is None:
+                backdrop = self._renderer._backdrop(self)
+
+                total_pixels = font_height * length
+                region = backdrop[y:y + font_height, x:x + length]
+                sum_color = region.reshape(-1, 3).sum(axis=0, dtype=np.int64)
+                average = tuple(int(x) // total_pixels for x in sum_color)
+
+            color = contrast_color(average)
 
         if icon and alignment is Anchor.LEFT:
             self.draw_bitmap(bitmap, x, y)
-            x = x + bitmap['width'] + spacing
+            x = x + bitmap.width + spacing
 
-        for char in string:
-            x = self.draw_char(char, x, y, color, scale) + scaled_spacing
+        self._blit_mask(x, y, mask, color)
+        x = x + length + scaled_spacing
 
         if icon and alignment is Anchor.RIGHT:
             self.draw_bitmap(bitmap, x, y)
@@ -179,20 +339,286 @@ class Renderer:
                 y < 0 or y >= self._window_height):
             raise Exception('({}, {}) is out of bounds.'.format(x, y))
 
-        color = color if brightness == 1.0 else modify_brightness(color, brightness)
-        scale = scale if scale else self._scale
+        if brightness != 1.0:
+            color = brightness_lut(brightness)[list(color)]
+        scale = self._draw_scale(scale)
+
+        self.rgb[y:y + scale, x:x + scale] = color
+        self.alpha[y:y + scale, x:x + scale] = True
+        self._drawn()
+
+
+class Renderer:
+    def __init__(self, sink, scale=1, metrics=NULL_METRICS, workers=None,
+                 color=None):
+        print('Renderer init(%dx%d) scale: %d' % (*sink.size(), scale))
+        print('Renderer sink: %s' % (sink.__class__.__name__))
+
+        self._metrics = metrics
+        self._scale = scale
+        self._window_width, self._window_height = sink.size()
+        self._buffer = np.zeros(
+            (self._window_height, self._window_width, 3), dtype=np.uint8)
+        self._presented = None
+        # The color pipeline turns the composited frame into what is shown.
+        self.color = color or ColorPipeline()
+        self._output = np.zeros_like(self._buffer)
+        self._color_state = None
+        self._changed = np.zeros(
+            (self._window_height, self._window_width), dtype=bool)
+
+        if workers is None:
+            workers = min(os.cpu_count() or 1, MAX_TILE_WORKERS)
+        if self._window_width * self._window_height < TILE_MIN_PIXELS:
+            workers = 1
+        self._workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers) \
+            if workers > 1 else None
+        self._make_tiles(1)
+        self._image_cache = collections.OrderedDict()
+        self._image_lock = threading.Lock()
+        self._sink = sink
 
-        for sx in range(scale):
-            for sy in range(scale):
-                index = (y + sy) * self._window_width + (x + sx)
-                self._buffer[index] = color
+        # Drawing straight on the Renderer goes to a bottom 'default' layer
+        # at the panel's resolution.
+        self._layers = []
+        self._default_layer = self.add_layer('default', scale=1)
+
+    def size(self):
+        return (self._window_width, self._window_height)
+
+    def add_layer(self, name, paint=None, opacity=1.0, scale=None):
+        # Layers are composited in the order they are added, bottom first.
+        # |paint| is called with the layer to redraw it after invalidate().
+        # Layers are drawn at the renderer's scale unless |scale| is given;
+        # use a scale of 1 for content such as images at panel resolution.
+        if self.layer(name):
+            raise Exception('Layer {} already exists.'.format(name))
+
+        if scale is None:
+            # A renderer scale which does not divide the window is still drawn
+            # at that scale, clipped at the edges, on a native layer.
+            width, height = self.size()
+            scale = 1 if width % self._scale or height % self._scale else self._scale
+
+        layer = Layer(self, name, paint, opacity, scale)
+        self._layers.append(layer)
+
+        if self._tile_alignment % layer.scale:
+            self._make_tiles(self._tile_alignment * layer.scale //
+                             math.gcd(self._tile_alignment, layer.scale))
+        return layer
+
+    def layer(self, name):
+        for layer in self._layers:
+            if layer.name == name:
+                return layer
+        return None
+
+    def invalidate(self):
+        # Forces the next render() to transmit the whole frame.
+        self._presented = None
+
+    def image_frame(self, image, brightness=1.0):
+        # Returns |image| as a frame at panel resolution. Safe to call from
+        # other threads.
+        pixels = self._prepare_image(image)
+        if brightness == 1.0:
+            return pixels.copy()
+        return np.take(brightness_lut(brightness), pixels)
+
+    def _prepare_image(self, image, size=None):
+        size = size or (self._window_width, self._window_height)
+        key = (id(image), size)
+
+        # The source image is kept in the entry so its id() stays unique.
+        with self._image_lock:
+            entry = self._image_cache.get(key)
+            if entry and entry[0] is image:
+                self._image_cache.move_to_end(key)
+                return entry[1]
+
+        resized = center_crop(image, size).convert("RGB").resize(size)
+        pixels = np.asarray(resized, dtype=np.uint8)
+
+        with self._image_lock:
+            self._image_cache[key] = (image, pixels)
+            if len(self._image_cache) > IMAGE_CACHE_SIZE:
+                self._image_cache.popitem(last=False)
+        return pixels
+
+    def _make_tiles(self, alignment):
+        # Tiles are bands of rows starting on a whole pixel of every layer.
+        self._tile_alignment = alignment
+        units = np.array_split(np.arange(self._window_height // alignment),
+                               self._workers)
+        self._tiles = [slice(int(band[0]) * alignment, (int(band[-1]) + 1) * alignment)
+                       for band in units if len(band)]
+
+    def _for_each_tile(self, function):
+        if self._executor is None:
+            for rows in self._tiles:
+                function(rows)
+        else:
+            list(self._executor.map(function, self._tiles))
+
+    def _composite(self, layers, out):
+        self._for_each_tile(lambda rows: self._composite_tile(layers, out, rows))
+
+    def _composite_tile(self, layers, out, rows):
+        out = out[rows]
+        out.fill(0)
+
+        # Runs of opaque layers sharing a scale are flattened at their own
+        # resolution first so the run is only upscaled once.
+        run = []
+        for layer in layers:
+            if layer.opacity <= 0.0:
+                continue
+
+            if run and (layer.scale != run[0].scale or layer.opacity < 1.0):
+                self._composite_run(run, out, rows)
+                run = []
+
+            if layer.scale > 1 and layer.opacity >= 1.0:
+                run.append(layer)
+                continue
+
+            scaled = slice(rows.start // layer.scale, rows.stop // layer.scale)
+            _blend(out, layer.rgb[scaled], layer.alpha[scaled], layer.opacity,
+                   layer.scale)
+
+        if run:
+            self._composite_run(run, out, rows)
+
+    def _composite_run(self, run, out, rows):
+        scale = run[0].scale
+        scaled = slice(rows.start // scale, rows.stop // scale)
+        if len(run) == 1:
+            _blend(out, run[0].rgb[scaled], run[0].alpha[scaled], 1.0, scale)
+            return
+
+        rgb = np.zeros_like(run[0].rgb[scaled])
+        alpha = np.zeros_like(run[0].alpha[scaled])
+        for layer in run:
+            np.copyto(rgb, layer.rgb[scaled], where=layer.alpha[scaled][..., None])
+            alpha |= layer.alpha[scaled]
+        _blend(out, rgb, alpha, 1.0, scale)
+
+    def _diff_tile(self, frame, rows):
+        np.any(frame[rows] != self._presented[rows], axis=2,
+               out=self._changed[rows])
+
+    def _apply_color(self, changed):
+        # Returns the frame to present and whether it may differ from the
+        # last one presented.
+        color = self.color
+        state = (color, color.version)
+        changed = changed or state != self._color_state
+        self._color_state = state
+        if color.is_identity():
+            return self._buffer, changed
+
+        if changed or color.dither:
+            if color.dither:
+                color.next_frame()
+            self._for_each_tile(
+                lambda rows: color.apply(self._buffer, self._output, rows))
+            return self._output, True
+        return self._output, False
+
+    def _backdrop(self, layer):
+        # Returns what is visible at |layer| including its own pixels so far.
+        index = self._layers.index(layer)
+        backdrop = np.empty_like(self._buffer)
+        self._composite(self._layers[:index + 1], backdrop)
+        if layer.scale == 1:
+            return backdrop
+
+        # Each layer pixel sees the average of the panel pixels it covers.
+        width, height = layer.size()
+        return backdrop.reshape(height, layer.scale, width, layer.scale, 3).mean(
+            axis=(1, 3)).astype(np.uint8)
+
+    def _backdrop_average(self, layer, box):
+        # Returns the average color beneath |box| of |layer| straight from a
+        # Palette when the only thing there is an analysed image, or None
+        # when the backdrop has to be composited.
+        left, top, right, bottom = (value * layer.scale for value in box)
+        index = self._layers.index(layer)
+        for below in reversed(self._layers[:index + 1]):
+            if below.opacity <= 0.0 or below._empty:
+                continue
+
+            scale = below.scale
+            region = (left // scale, top // scale,
+                      -(-right // scale), -(-bottom // scale))
+            if below._palette and below.opacity >= 1.0:
+                palette, brightness = below._palette
+                return palette.average(*region, brightness=brightness)
+
+            region_left, region_top, region_right, region_bottom = region
+            if below.alpha[max(region_top, 0):max(region_bottom, 0),
+                           max(region_left, 0):max(region_right, 0)].any():
+                return None
+        return (0, 0, 0)
+
+    def draw_bitmap(self, bitmap, x, y):
+        self._default_layer.draw_bitmap(bitmap, x, y)
+
+    def draw_image(self, image, brightness, palette=None):
+        self._default_layer.draw_image(image, brightness, palette)
+
+    def draw_char(self, char, x, y, color, scale=None):
+        return self._default_layer.draw_char(char, x, y, color, scale)
+
+    def draw_string(self, string,
+                    anchor=Anchor.LEFT, color=None,
+                    padding=1, spacing=1, icon=None, scale=None):
+        self._default_layer.draw_string(
+            string, anchor, color, padding, spacing, icon, scale)
+
+    def putpixel(self, position, color, brightness=1.0, scale=None):
+        self._default_layer.putpixel(position, color, brightness, scale)
 
     def render(self):
-        for index in range(len(self._buffer)):
-            position = (
-                index %
-                self._window_width, int(
-                    index / self._window_width))
-            self._sink.putpixel(position, self._buffer[index])
-
-        self._sink.render()
+        # Layers are only repainted when invalidated, or when they contrast
+        # with a lower layer that changed in this pass.
+        metrics = self._metrics
+        changed = False
+        for layer in self._layers:
+            if layer.paint and (layer._invalid or
+                                (changed and layer._reads_backdrop)):
+                with metrics.stage(layer._paint_stage):
+                    layer._repaint()
+
+            changed = changed or layer._changed
+            layer._changed = False
+
+        if changed:
+            with metrics.stage('composite'):
+                self._composite(self._layers, self._buffer)
+
+        with metrics.stage('color'):
+            frame, changed = self._apply_color(changed)
+
+        if self._presented is None:
+            with metrics.stage('sink'):
+                self._sink.push_frame(frame)
+            self._presented = frame.copy()
+            return
+
+        if not changed:
+            metrics.count('unchanged_frames')
+            return
+
+        with metrics.stage('diff'):
+            self._for_each_tile(lambda rows: self._diff_tile(frame, rows))
+            dirty = dirty_boxes(self._changed)
+        if not dirty:
+            metrics.count('unchanged_frames')
+            return
+
+        with metrics.stage('sink'):
+            self._sink.push_frame(frame, dirty)
+        np.copyto(self._presented, frame)
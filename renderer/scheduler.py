@@ -0,0 +1,61 @@
+import time
+
+DEFAULT_FPS = 30
+SECONDS_PER_MINUTE = 60
+
+
+class FrameScheduler:
+    def __init__(self, fps=DEFAULT_FPS, clock=time.monotonic, wall_clock=time.time):
+        self._frame_interval = 1.0 / fps
+        self._clock = clock
+        self._wall_clock = wall_clock
+
+        self._requested_at = None
+        self._next_frame = clock()
+        self._deadline = None
+        self._minute = None
+        self.dropped_frames = 0
+
+    def request(self):
+        if self._requested_at is None:
+            self._requested_at = self._clock()
+
+    def _minute_changed(self):
+        return int(self._wall_clock() // SECONDS_PER_MINUTE) != self._minute
+
+    def timeout(self, next_change=None):
+        # Returns how long to sleep before the next frame is due; zero means a
+        # frame should be drawn now. |next_change| is the clock time from
+        # which an animation is moving, if any. Requests and animation are
+        # capped to the target frame rate.
+        now = self._clock()
+        if self._requested_at is None and self._minute_changed():
+            self._requested_at = now
+
+        deadline = None
+        if self._requested_at is not None:
+            deadline = max(self._next_frame, self._requested_at)
+        if next_change is not None:
+            animation = max(self._next_frame, next_change)
+            deadline = animation if deadline is None else min(deadline, animation)
+        self._deadline = deadline
+
+        # Never sleep past the next change of the clock text.
+        timeout = SECONDS_PER_MINUTE - self._wall_clock() % SECONDS_PER_MINUTE
+        if deadline is not None:
+            timeout = min(timeout, deadline - now)
+        return max(timeout, 0.0)
+
+    def begin_frame(self):
+        now = self._clock()
+
+        # Frames which could not be drawn on time are dropped rather than
+        # drawn back to back to catch up.
+        late = now - (self._deadline if self._deadline is not None else now)
+        if late > self._frame_interval:
+            self.dropped_frames += int(late // self._frame_interval)
+
+        self._next_frame = now + self._frame_interval
+        self._requested_at = None
+        self._deadline = None
+        self._minute = int(self._wall_clock() // SECONDS_PER_MINUTE)
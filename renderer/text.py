@@ -0,0 +1,49 @@
+from asset.font import FONT
+
+import functools
+import numpy as np
+
+FONT_WIDTH, FONT_HEIGHT = FONT['font_dimens']
+TEXT_CACHE_SIZE = 64
+
+
+def _compile_font(font):
+    glyphs = {}
+    for char, glyph in font.items():
+        if char == 'font_dimens':
+            continue
+
+        # Narrow glyphs are right aligned in the font cell so the unused
+        # columns on the left are dropped.
+        width = glyph.get('width', FONT_WIDTH)
+        mask = np.array(glyph['data'], dtype=bool).reshape(
+                FONT_HEIGHT, FONT_WIDTH)[:, FONT_WIDTH - width:]
+        mask = np.ascontiguousarray(mask)
+        mask.flags.writeable = False
+        glyphs[char] = mask
+    return glyphs
+
+
+GLYPHS = _compile_font(FONT)
+
+
+@functools.lru_cache(maxsize=None)
+def glyph_mask(char, scale):
+    mask = GLYPHS[char].repeat(scale, axis=0).repeat(scale, axis=1)
+    mask.flags.writeable = False
+    return mask
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def text_mask(text, scale, spacing):
+    width = sum(GLYPHS[char].shape[1] + spacing for char in text) - spacing
+    mask = np.zeros((FONT_HEIGHT * scale, max(width * scale, 0)), dtype=bool)
+
+    x = 0
+    for char in text:
+        glyph = glyph_mask(char, scale)
+        mask[:, x:x + glyph.shape[1]] |= glyph
+        x += glyph.shape[1] + spacing * scale
+
+    mask.flags.writeable = False
+    return mask
@@ -4,9 +4,10 @@ try:
 except:
   from Tkinter import *
 
-from renderer.renderer import RendererSink
+from renderer.renderer import RendererSink, as_frame
 from time import sleep
 
+import numpy as np
 import queue
 import sys
 
@@ -19,7 +20,7 @@ class TkSink(RendererSink):
   def __init__(self, size):
     RendererSink.__init__(self, size)
 
-    self._buffer = [(0, 0, 0) for i in range(size[0] * size[1])]
+    self._buffer = np.zeros((size[1], size[0], 3), dtype=np.uint8)
     self._queue = queue.Queue()
 
     width =  (size[0] * CELL_DIM) + ((size[0] - 1) * CELL_PADDING) + (WINDOW_PADDING * 2)
@@ -34,8 +35,19 @@ class TkSink(RendererSink):
     canvas.configure(background='black')
     self._canvas = canvas
 
+    # Cells are created once and recolored in place as frames change.
+    self._drawn = np.zeros_like(self._buffer)
+    self._cells = [[self._create_cell(px, py) for px in range(size[0])]
+                   for py in range(size[1])]
+
     self._on_render()
 
+  def _create_cell(self, px, py):
+    x = px * (CELL_DIM + CELL_PADDING) + WINDOW_PADDING
+    y = py * (CELL_DIM + CELL_PADDING) + WINDOW_PADDING
+    return self._canvas.create_rectangle(
+        x, y, x + CELL_DIM, y + CELL_DIM, fill='#000000')
+
   def start(self):
     try:
       self._root.mainloop()
@@ -43,33 +55,41 @@ class TkSink(RendererSink):
       self._queue.put(False)
       sys.exit(0)
 
+  def push_frame(self, frame, dirty=None):
+    frame = as_frame(frame, self._size)
+    for left, top, right, bottom in dirty or [(0, 0, *self._size)]:
+      self._buffer[top:bottom, left:right] = frame[top:bottom, left:right]
+    self.render()
+
   def putpixel(self, position, color=(255, 255, 255)):
     x, y = position
-    index = y * self._size[0] + x
-    self._buffer[index] = color
+    self._buffer[y, x] = color
 
   def render(self):
-    self._queue.put(True)
+    self._queue.put(self._buffer.copy())
 
   def _on_render(self):
+    # Only the most recent frame queued since the last tick is drawn.
+    frame = None
     while True:
       try:
-        v = self._queue.get(timeout=0)
-        if not v:
-          return
-
-        self._render()
-      except:
+        item = self._queue.get_nowait()
+      except queue.Empty:
         break
 
-    self._root.after(33, self._on_render)
+      if item is False:
+        return
+      frame = item
+
+    if frame is not None:
+      self._render(frame)
 
-  def _render(self):
-    for index in range(len(self._buffer)):
-      position = (index % self._size[0], int(index / self._size[1]))
+    self._root.after(33, self._on_render)
 
-      x = position[0] * (CELL_DIM + CELL_PADDING) + WINDOW_PADDING
-      y = position[1] * (CELL_DIM + CELL_PADDING) + WINDOW_PADDING
+  def _render(self, frame):
+    changed = np.any(frame != self._drawn, axis=2)
+    for py, px in zip(*np.nonzero(changed)):
+      color = '#%02x%02x%02x' % tuple(frame[py, px].tolist())
+      self._canvas.itemconfigure(self._cells[py][px], fill=color)
 
-      color = '#%02x%02x%02x' % self._buffer[index]
-      self._canvas.create_rectangle(x, y, x + CELL_DIM, y + CELL_DIM, fill=color)
+    self._drawn = frame
@@ -0,0 +1,72 @@
+import numpy as np
+
+FADE = 'fade'
+WIPE = 'wipe'
+DISSOLVE = 'dissolve'
+TRANSITIONS = (FADE, WIPE, DISSOLVE)
+
+# Every frame of a transition is computed up front when they all fit in this
+# many bytes; larger transitions compute each frame as it is shown.
+PRECOMPUTE_BUDGET = 4 * 1024 * 1024
+# Crossfade weights are fixed point with this many fractional bits so the
+# arithmetic fits in int16.
+WEIGHT_BITS = 7
+
+
+class Transition:
+    # Blends from the |old| to the |new| panel frame in |steps| distinct
+    # frames. |progress| runs from 0.0 to 1.0 and is meant to be animated.
+    def __init__(self, old, new, kind=FADE, steps=60,
+                 precompute_budget=PRECOMPUTE_BUDGET, seed=None):
+        if kind not in TRANSITIONS:
+            raise Exception('Unknown transition {}.'.format(kind))
+
+        self.old = old
+        self.new = new
+        self.kind = kind
+        self.steps = max(steps, 1)
+        self.progress = 0.0
+
+        if kind == FADE:
+            self._difference = new.astype(np.int16) - old
+        elif kind == DISSOLVE:
+            # Pixels switch over in a random order fixed for the transition.
+            height, width = old.shape[:2]
+            self._order = np.random.RandomState(seed).permutation(
+                height * width).reshape(height, width)
+
+        self._frames = None
+        if (self.steps + 1) * old.nbytes <= precompute_budget:
+            self._frames = [self._render(step) for step in range(self.steps + 1)]
+
+    def is_done(self):
+        return self.progress >= 1.0
+
+    def frame(self, progress=None):
+        progress = self.progress if progress is None else progress
+        step = min(max(int(round(progress * self.steps)), 0), self.steps)
+        if self._frames is not None:
+            return self._frames[step]
+        return self._render(step)
+
+    def _render(self, step):
+        if step == 0:
+            return self.old
+        if step == self.steps:
+            return self.new
+
+        if self.kind == FADE:
+            weight = (step << WEIGHT_BITS) // self.steps
+            frame = self._difference * np.int16(weight)
+            frame >>= WEIGHT_BITS
+            frame += self.old
+            return frame.astype(np.uint8)
+
+        if self.kind == WIPE:
+            edge = step * self.old.shape[1] // self.steps
+            frame = self.old.copy()
+            frame[:, :edge] = self.new[:, :edge]
+            return frame
+
+        revealed = self._order < step * self._order.size // self.steps
+        return np.where(revealed[..., None], self.new, self.old)
@@ -0,0 +1,474 @@
+from PIL import Image
+
+from asset.font import FONT
+from asset.icon import (
+    RAIN_BITMAP, STORM, STORM_BITMAP, SUN, SUN_BITMAP)
+from fakes import CaptureSink
+from renderer.color import ColorPipeline
+from renderer.renderer import (
+    Anchor, Renderer, center_crop)
+from renderer.text import text_mask
+
+import colorsys
+import math
+import unittest
+from unittest import mock
+
+
+# The original HSV brightness adjustment used by ReferenceRenderer.
+def modify_brightness(color, brightness):
+    r, g, b = color
+    hsv = colorsys.rgb_to_hsv(r / 255.0, g / 255.0, b / 255.0)
+    return tuple(int(value * 0xFF) for value in colorsys.hsv_to_rgb(
+            hsv[0], hsv[1], hsv[2] * brightness))
+
+
+# The original list-of-tuples Renderer, kept to check pixel parity. The only
+# change is that draw_bitmap() and draw_char() pass their scale by keyword; the
+# original passed it positionally as the brightness.
+class ReferenceRenderer:
+    def __init__(self, size, scale=1):
+        self._scale = scale
+        self._window_width, self._window_height = size
+        self._buffer = [
+            (0, 0, 0) for i in range(self._window_width * self._window_height)]
+
+    def draw_bitmap(self, bitmap, x, y):
+        data = bitmap['data']
+        width = bitmap['width']
+        height = int(len(data) / width)
+
+        def hex_to_rgb(value):
+            value = hex(value).lstrip('0x')
+            lv = len(value)
+            return tuple(int(value[i:i + lv // 3], 16) for i in range(0, lv, lv // 3))
+
+        for dx in range(width):
+            for dy in range(height):
+                value = data[dy * width + dx]
+
+                if not value:
+                    continue
+
+                color = hex_to_rgb(bitmap['pallete'][value - 1])
+                self.putpixel((x + self._scale * dx, y + self._scale * dy), color,
+                              scale=self._scale)
+
+    def draw_image(self, image, brightness):
+        image = center_crop(image).convert("RGB")
+        image = image.resize((self._window_width, self._window_height))
+
+        for y in range(self._window_height):
+            for x in range(self._window_width):
+                color = image.getpixel((x, y))
+                self.putpixel((x, y), color, brightness, scale=1)
+
+    def draw_char(self, char, x, y, color, scale=None):
+        font_width, font_height = FONT['font_dimens']
+        scale = scale if scale else self._scale
+
+        width = FONT[char].get('width', font_width)
+        width_offset = (font_width - width)
+
+        for dy in range(font_height):
+            for dx in range(font_width):
+                position = (x + ((dx - width_offset) * scale), y + (dy * scale))
+
+                if FONT[char]['data'][dy * font_width + dx]:
+                    self.putpixel(position, color, scale=scale)
+
+        return x + (width * scale)
+
+    def draw_string(self, string,
+                    anchor=Anchor.LEFT, color=None,
+                    padding=1, spacing=1, icon=None, scale=None):
+        font_width, font_height = FONT['font_dimens']
+        bitmap, alignment = icon if icon else (None, None)
+
+        scale = scale if scale else self._scale
+        scaled_spacing = spacing * scale
+        scaled_padding = padding * scale
+
+        def calc_length():
+            length = 0
+            for char in string:
+                length += FONT[char].get('width', font_width) + spacing
+            return (length - spacing) * scale
+
+        def calc_x():
+            if anchor & Anchor.LEFT:
+                return scaled_padding
+            if anchor & Anchor.RIGHT:
+                x = self._window_width - calc_length() - scaled_padding
+                return x if not bitmap else x - bitmap['width'] * scale - scaled_spacing
+
+            return math.ceil((self._window_width - calc_length()) / 2)
+
+        def calc_y():
+            if anchor & Anchor.TOP:
+                return scaled_padding
+            if anchor & Anchor.BOTTOM:
+                return self._window_height - font_height * scale - scaled_padding
+
+            return math.ceil((self._window_height - font_height * scale) / 2)
+
+        x = calc_x()
+        y = calc_y()
+
+        if color is None:
+            total_pixels = font_height * calc_length()
+            sum_color = (0, 0, 0)
+            for dx in range(calc_length()):
+                for dy in range(font_height):
+                    cell_color = self._buffer[
+                            (dy + y) * self._window_width + (dx + x)]
+                    sum_color = tuple(
+                            sum(x) for x in zip(sum_color, cell_color))
+
+            color = tuple(int(x/total_pixels) for x in sum_color)
+            color = tuple(255 if x < 128 else 0 for x in color)
+
+        if icon and alignment is Anchor.LEFT:
+            self.draw_bitmap(bitmap, x, y)
+            x = x + bitmap['width'] + spacing
+
+        for char in string:
+            x = self.draw_char(char, x, y, color, scale) + scaled_spacing
+
+        if icon and alignment is Anchor.RIGHT:
+            self.draw_bitmap(bitmap, x, y)
+
+    def putpixel(self, position, color, brightness=1.0, scale=None):
+        x, y = position
+        color = color if brightness == 1.0 else modify_brightness(color, brightness)
+        scale = scale if scale else self._scale
+
+        for sx in range(scale):
+            for sy in range(scale):
+                index = (y + sy) * self._window_width + (x + sx)
+                self._buffer[index] = color
+
+
+def gradient_image(width, height):
+    image = Image.new('RGB', (width, height))
+    image.putdata([((x * 7) % 256, (y * 5) % 256, ((x + y) * 3) % 256)
+                   for y in range(height) for x in range(width)])
+    return image
+
+
+class RendererParityTest(unittest.TestCase):
+    def assertParity(self, draw, size=(32, 32), scale=1, tolerance=0):
+        sink = CaptureSink(size)
+        renderer = Renderer(sink, scale=scale)
+        reference = ReferenceRenderer(size, scale=scale)
+
+        draw(renderer)
+        draw(reference)
+        renderer.render()
+
+        for index, (actual, expected) in enumerate(
+                zip(sink.frame(), reference._buffer)):
+            for a, e in zip(actual, expected):
+                self.assertLessEqual(
+                    abs(a - e), tolerance,
+                    'pixel %d: %s != %s' % (index, actual, expected))
+
+    def test_putpixel_scaled(self):
+        def draw(renderer):
+            renderer.putpixel((3, 4), (10, 20, 30))
+            renderer.putpixel((10, 12), (200, 100, 50), scale=3)
+        self.assertParity(draw, scale=2)
+
+    def test_draw_char(self):
+        def draw(renderer):
+            x = 1
+            for char in '0123456789:.':
+                x = renderer.draw_char(char, x, 2, (255, 0, 255)) + 1
+        self.assertParity(draw, size=(64, 32))
+
+    def test_draw_string_anchors(self):
+        for scale in (1, 2):
+            def draw(renderer):
+                renderer.draw_string('12:34', anchor=Anchor.TOP | Anchor.LEFT,
+                                     color=(255, 255, 255))
+                renderer.draw_string('56', anchor=Anchor.CENTER,
+                                     color=(0, 255, 0))
+                renderer.draw_string('7.8', anchor=Anchor.BOTTOM | Anchor.RIGHT,
+                                     color=(0, 0, 255))
+            self.assertParity(draw, scale=scale)
+
+    def test_draw_string_icons(self):
+        for scale in (1, 2):
+            def draw(renderer):
+                # The reference renderer only understands palette bitmaps.
+                sprites = isinstance(renderer, Renderer)
+                storm = STORM if sprites else STORM_BITMAP
+                sun = SUN if sprites else SUN_BITMAP
+
+                renderer.draw_string('72', anchor=Anchor.BOTTOM | Anchor.RIGHT,
+                                     color=(255, 255, 255),
+                                     icon=(storm, Anchor.RIGHT))
+                renderer.draw_string('9', anchor=Anchor.TOP | Anchor.LEFT,
+                                     color=(255, 0, 0), icon=(sun, Anchor.LEFT))
+                renderer.draw_bitmap(RAIN_BITMAP, 12, 12)
+            self.assertParity(draw, scale=scale)
+
+    def test_draw_bitmap_clips(self):
+        sink = CaptureSink((8, 8))
+        renderer = Renderer(sink, scale=2)
+        renderer.draw_bitmap(SUN, 4, -2)
+        renderer.render()
+
+        self.assertEqual(sink.pixels[(6, 0)], (0xFB, 0xEF, 0x42))
+        self.assertEqual(sink.pixels[(4, 0)], (0, 0, 0))
+
+    def test_draw_image(self):
+        image = gradient_image(48, 40)
+        self.assertParity(lambda renderer: renderer.draw_image(image, 1.0))
+        self.assertParity(lambda renderer: renderer.draw_image(image, 0.5),
+                          tolerance=1)
+
+    def test_putpixel_brightness(self):
+        def draw(renderer):
+            renderer.putpixel((1, 1), (200, 100, 50), 0.3)
+            renderer.putpixel((4, 4), (255, 255, 255), 0.75, scale=2)
+        self.assertParity(draw, tolerance=1)
+
+    def test_draw_image_reuses_scaled_image(self):
+        image = gradient_image(48, 40)
+        renderer = Renderer(CaptureSink((16, 16)))
+        pixels = renderer._prepare_image(image)
+
+        for brightness in (0.1, 0.2, 0.3):
+            renderer.draw_image(image, brightness)
+        self.assertIs(renderer._prepare_image(image), pixels)
+
+    def test_draw_string_auto_color(self):
+        image = gradient_image(40, 40)
+
+        def draw(renderer):
+            renderer.draw_image(image, 0.35)
+            renderer.draw_string('1:23', anchor=Anchor.TOP | Anchor.LEFT)
+            renderer.draw_string('45', anchor=Anchor.BOTTOM | Anchor.RIGHT,
+                                 icon=(SUN_BITMAP, Anchor.RIGHT))
+        self.assertParity(draw, tolerance=1)
+
+
+class TextMaskTest(unittest.TestCase):
+    def test_text_mask_is_cached(self):
+        mask = text_mask('12:34', 2, 1)
+
+        self.assertIs(text_mask('12:34', 2, 1), mask)
+        self.assertEqual(mask.shape, (10, (1 + 1 + 3 + 1 + 1 + 1 + 3 + 1 + 3) * 2))
+        self.assertFalse(mask.flags.writeable)
+
+
+class LayerTest(unittest.TestCase):
+    def setUp(self):
+        self.sink = CaptureSink((16, 16))
+        self.renderer = Renderer(self.sink)
+        self.paints = []
+
+    def add_layer(self, name, draw):
+        def paint(layer):
+            self.paints.append(name)
+            draw(layer)
+        return self.renderer.add_layer(name, paint)
+
+    def test_only_invalidated_layers_are_repainted(self):
+        background = self.add_layer(
+            'background', lambda layer: layer.putpixel((0, 0), (9, 9, 9)))
+        self.add_layer('clock', lambda layer: layer.draw_string(
+            '1', color=(255, 255, 255)))
+        self.renderer.render()
+        self.assertEqual(self.paints, ['background', 'clock'])
+
+        background.invalidate()
+        self.renderer.render()
+        self.assertEqual(self.paints, ['background', 'clock', 'background'])
+
+    def test_auto_color_layers_follow_the_backdrop(self):
+        background = self.add_layer(
+            'background', lambda layer: layer.draw_image(
+                gradient_image(16, 16), 1.0))
+        self.add_layer('clock', lambda layer: layer.draw_string('1'))
+        self.renderer.render()
+
+        background.invalidate()
+        self.renderer.render()
+        self.assertEqual(self.paints, ['background', 'clock'] * 2)
+
+    def test_layer_opacity_is_blended(self):
+        layer = self.renderer.add_layer('overlay')
+        self.renderer.putpixel((1, 1), (200, 0, 0))
+        layer.putpixel((1, 1), (0, 0, 200))
+        layer.opacity = 0.5
+        self.renderer.render()
+
+        self.assertEqual(self.sink.pixels[(1, 1)], (100, 0, 100))
+
+
+class RendererSinkTest(unittest.TestCase):
+    def test_push_frame_falls_back_to_putpixel(self):
+        sink = CaptureSink((2, 2))
+        frame = bytes([1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12])
+        sink.push_frame(frame)
+
+        self.assertEqual(sink.frame(),
+                         [(1, 2, 3), (4, 5, 6), (7, 8, 9), (10, 11, 12)])
+
+
+class DirtyRegionTest(unittest.TestCase):
+    def test_unchanged_frame_is_not_pushed(self):
+        sink = CaptureSink((16, 16))
+        renderer = Renderer(sink)
+        renderer.render()
+        renderer.render()
+
+        self.assertEqual(sink.pushes, [None])
+
+    def test_unchanged_frame_skips_the_diff(self):
+        renderer = Renderer(CaptureSink((16, 16)), color=ColorPipeline(gamma=2.2))
+        renderer.render()
+
+        with mock.patch.object(renderer, '_diff_tile') as diff:
+            renderer.render()
+            diff.assert_not_called()
+
+            renderer.color.gamma = 1.0
+            renderer.render()
+            diff.assert_called()
+
+    def test_only_changed_bands_are_pushed(self):
+        sink = CaptureSink((16, 16))
+        renderer = Renderer(sink)
+        renderer.render()
+
+        renderer.putpixel((2, 3), (255, 0, 0))
+        renderer.putpixel((5, 4), (255, 0, 0))
+        renderer.putpixel((9, 10), (0, 255, 0), scale=2)
+        sink.pixels.clear()
+        renderer.render()
+
+        self.assertEqual(sink.pushes[-1], [(2, 3, 6, 5), (9, 10, 11, 12)])
+        self.assertEqual(len(sink.pixels), 4 * 2 + 2 * 2)
+        self.assertEqual(sink.pixels[(9, 11)], (0, 255, 0))
+
+
+class TiledRenderTest(unittest.TestCase):
+    def render(self, workers):
+        sink = CaptureSink((128, 64))
+        renderer = Renderer(sink, workers=workers)
+        renderer.add_layer('scaled', scale=4).putpixel((10, 10), (0, 0, 255))
+        image = Image.new('RGB', (200, 100))
+        image.putdata([(x % 256, y % 256, (x * y) % 256)
+                       for y in range(100) for x in range(200)])
+        renderer.draw_image(image, 0.5)
+        overlay = renderer.add_layer('overlay', opacity=0.5)
+        overlay.draw_string('12:34', anchor=Anchor.CENTER, color=(255, 255, 255))
+        renderer.render()
+
+        renderer.putpixel((3, 20), (255, 0, 0))
+        renderer.putpixel((100, 50), (0, 255, 0))
+        renderer.render()
+        return sink
+
+    def test_tiles_match_untiled_render(self):
+        tiled = self.render(workers=3)
+        untiled = self.render(workers=1)
+
+        self.assertEqual(tiled.frame(), untiled.frame())
+        self.assertEqual(tiled.pushes, untiled.pushes)
+        self.assertEqual(tiled.pushes[-1], [(3, 20, 4, 21), (100, 50, 101, 51)])
+
+
+class ScaledLayerTest(unittest.TestCase):
+    def test_scaled_layer_matches_scaled_drawing(self):
+        def draw(target):
+            target.draw_string('12:34', anchor=Anchor.TOP | Anchor.LEFT,
+                               color=(255, 255, 255))
+            target.draw_string('7', anchor=Anchor.BOTTOM | Anchor.RIGHT,
+                               color=(0, 255, 0), icon=(SUN, Anchor.RIGHT))
+
+        native = CaptureSink((32, 32))
+        renderer = Renderer(native, scale=2)
+        draw(renderer)
+        renderer.render()
+
+        scaled = CaptureSink((32, 32))
+        renderer = Renderer(scaled, scale=2)
+        layer = renderer.add_layer('text')
+        self.assertEqual(layer.size(), (16, 16))
+        draw(layer)
+        renderer.render()
+
+        self.assertEqual(scaled.frame(), native.frame())
+
+    def test_scaled_putpixel_covers_a_block(self):
+        sink = CaptureSink((8, 8))
+        renderer = Renderer(sink, scale=2)
+        renderer.add_layer('pixels').putpixel((1, 2), (255, 0, 0))
+        renderer.render()
+
+        self.assertEqual(sink.pushes, [None])
+        self.assertEqual(sorted(position for position, color in sink.pixels.items()
+                                if color != (0, 0, 0)),
+                         [(2, 4), (2, 5), (3, 4), (3, 5)])
+
+    def test_native_layer_beneath_scaled_layers(self):
+        sink = CaptureSink((16, 16))
+        renderer = Renderer(sink, scale=4)
+        background = renderer.add_layer('background', scale=1)
+        background.putpixel((1, 1), (9, 9, 9), scale=1)
+        background.putpixel((14, 14), (8, 8, 8), scale=1)
+        renderer.add_layer('a').putpixel((3, 3), (255, 0, 0))
+        renderer.add_layer('b').putpixel((3, 3), (0, 255, 0))
+        renderer.add_layer('c', opacity=0.5).putpixel((0, 0), (0, 0, 200))
+        renderer.render()
+
+        self.assertEqual(sink.pixels[(1, 1)], (4, 4, 104))
+        self.assertEqual(sink.pixels[(2, 2)], (0, 0, 100))
+        self.assertEqual(sink.pixels[(13, 13)], (0, 255, 0))
+        self.assertEqual(sink.pixels[(14, 14)], (0, 255, 0))
+        self.assertEqual(sink.pixels[(11, 11)], (0, 0, 0))
+
+    def test_scaled_auto_color_reads_the_backdrop(self):
+        sink = CaptureSink((16, 16))
+        renderer = Renderer(sink, scale=2)
+        background = renderer.add_layer('background', scale=1)
+        background.draw_image(Image.new('RGB', (16, 16), (250, 250, 250)), 1.0)
+        renderer.add_layer('clock').draw_string('1', anchor=Anchor.TOP | Anchor.LEFT)
+        renderer.render()
+
+        self.assertIn((0, 0, 0), [sink.pixels[(x, 2)] for x in range(2, 8)])
+
+    def test_scale_must_divide_the_window(self):
+        renderer = Renderer(CaptureSink((10, 10)))
+        with self.assertRaises(Exception):
+            renderer.add_layer('text', scale=3)
+        with self.assertRaises(Exception):
+            renderer.add_layer('text', scale=2).putpixel((0, 0), (1, 1, 1), scale=3)
+
+    def test_default_scale_not_dividing_the_window_is_clipped(self):
+        sink = CaptureSink((10, 10))
+        renderer = Renderer(sink, scale=3)
+        layer = renderer.add_layer('text')
+        self.assertEqual(layer.scale, 1)
+
+        layer.putpixel((9, 9), (0, 255, 0))
+        renderer.render()
+        self.assertEqual(sink.pixels[(9, 9)], (0, 255, 0))
+        self.assertNotEqual(sink.pixels.get((8, 8)), (0, 255, 0))
+
+
+class CenterCropTest(unittest.TestCase):
+    def test_crops_to_the_aspect_ratio(self):
+        image = Image.new('RGB', (300, 300))
+        self.assertEqual(center_crop(image, (128, 64)).size, (300, 150))
+        self.assertEqual(center_crop(image).size, (300, 300))
+        self.assertEqual(center_crop(Image.new('RGB', (400, 100)), (32, 32)).size,
+                         (100, 100))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+from fakes import FakeClock
+from renderer.scheduler import FrameScheduler
+
+import unittest
+
+
+class FrameSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock(100.0)
+        self.wall_clock = FakeClock(1000.0 * 60 + 10)
+        self.scheduler = FrameScheduler(
+            fps=10, clock=self.clock, wall_clock=self.wall_clock)
+        self.scheduler.begin_frame()
+
+    def test_static_screen_sleeps_until_next_minute(self):
+        self.assertAlmostEqual(self.scheduler.timeout(), 50.0)
+
+        self.wall_clock.now += 50.0
+        self.clock.now += 50.0
+        self.assertEqual(self.scheduler.timeout(), 0.0)
+
+    def test_requests_are_capped_to_frame_rate(self):
+        self.scheduler.request()
+        self.assertAlmostEqual(self.scheduler.timeout(), 0.1)
+
+        self.clock.now += 0.1
+        self.assertEqual(self.scheduler.timeout(), 0.0)
+        self.scheduler.begin_frame()
+        self.assertAlmostEqual(self.scheduler.timeout(), 50.0)
+
+    def test_animation_counts_dropped_frames(self):
+        started = self.clock.now
+        self.clock.now += 0.35
+        self.assertEqual(self.scheduler.timeout(next_change=started), 0.0)
+
+        self.scheduler.begin_frame()
+        self.assertEqual(self.scheduler.dropped_frames, 2)
+        self.assertAlmostEqual(self.scheduler.timeout(next_change=started), 0.1)
+        self.assertAlmostEqual(
+            self.scheduler.timeout(next_change=self.clock.now + 5.0), 5.0)
+
+    def test_idle_gaps_are_not_dropped_frames(self):
+        self.clock.now += 30.0
+        self.scheduler.request()
+        self.assertEqual(self.scheduler.timeout(), 0.0)
+        self.scheduler.begin_frame()
+
+        self.clock.now += 5.0
+        self.assertEqual(self.scheduler.timeout(next_change=self.clock.now), 0.0)
+        self.scheduler.begin_frame()
+        self.assertEqual(self.scheduler.dropped_frames, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
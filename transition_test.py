@@ -0,0 +1,72 @@
+from renderer.transition import DISSOLVE, FADE, WIPE, Transition
+
+import numpy as np
+import unittest
+
+
+def solid(color, size=(8, 4)):
+    frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+    frame[...] = color
+    return frame
+
+
+class TransitionTest(unittest.TestCase):
+    def setUp(self):
+        self.old = solid((200, 0, 40))
+        self.new = solid((0, 100, 250))
+
+    def test_endpoints(self):
+        for kind in (FADE, WIPE, DISSOLVE):
+            transition = Transition(self.old, self.new, kind, steps=10)
+            np.testing.assert_array_equal(transition.frame(0.0), self.old)
+            np.testing.assert_array_equal(transition.frame(1.0), self.new)
+            np.testing.assert_array_equal(transition.frame(1.5), self.new)
+
+    def test_fade_blends_every_pixel(self):
+        transition = Transition(self.old, self.new, FADE, steps=4)
+        frame = transition.frame(0.5)
+        self.assertEqual(frame[0, 0].tolist(), [100, 50, 145])
+        self.assertTrue((frame == frame[0, 0]).all())
+
+    def test_wipe_moves_from_left_to_right(self):
+        transition = Transition(self.old, self.new, WIPE, steps=4)
+        frame = transition.frame(0.25)
+        np.testing.assert_array_equal(frame[:, :2], self.new[:, :2])
+        np.testing.assert_array_equal(frame[:, 2:], self.old[:, 2:])
+
+    def test_dissolve_reveals_pixels_progressively(self):
+        transition = Transition(self.old, self.new, DISSOLVE, steps=4, seed=1)
+        revealed = [int((transition.frame(step / 4) == self.new).all(axis=2).sum())
+                    for step in range(5)]
+        self.assertEqual(revealed, [0, 8, 16, 24, 32])
+
+        previous = (transition.frame(0.25) == self.new).all(axis=2)
+        current = (transition.frame(0.5) == self.new).all(axis=2)
+        self.assertTrue(current[previous].all())
+
+    def test_progress_is_quantized_to_steps(self):
+        transition = Transition(self.old, self.new, FADE, steps=4)
+        self.assertIs(transition.frame(0.49), transition.frame(0.5))
+
+        transition.progress = 0.75
+        np.testing.assert_array_equal(transition.frame(), transition.frame(0.75))
+        self.assertFalse(transition.is_done())
+        transition.progress = 1.0
+        self.assertTrue(transition.is_done())
+
+    def test_frames_on_demand_match_precomputed_frames(self):
+        for kind in (FADE, WIPE, DISSOLVE):
+            precomputed = Transition(self.old, self.new, kind, steps=6, seed=3)
+            on_demand = Transition(self.old, self.new, kind, steps=6, seed=3,
+                                   precompute_budget=0)
+            for step in range(7):
+                np.testing.assert_array_equal(
+                    precomputed.frame(step / 6), on_demand.frame(step / 6))
+
+    def test_unknown_transition(self):
+        with self.assertRaises(Exception):
+            Transition(self.old, self.new, 'spin')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+from plugin import weather
+
+from unittest import mock
+
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+
+def observation(chill):
+    return {'current_observation': {'wind': {'chill': chill}}}
+
+
+class FakeInstance:
+    def __init__(self):
+        self.updated = threading.Event()
+
+    def update(self):
+        self.updated.set()
+
+
+class FakeLayer:
+    def __init__(self):
+        self.invalidated = 0
+
+    def invalidate(self):
+        self.invalidated += 1
+
+
+class WeatherTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'weather_{}.data')
+
+        patches = [
+            mock.patch.object(weather, 'CACHE_FILEPATH', self.path),
+            mock.patch.object(weather, 'WeatherFetcher'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_refresh_writes_cache_and_keeps_it_in_memory(self):
+        fetcher = weather.CachedWeatherFetcher()
+        fetcher._wrapped_fetched.fetch.return_value = observation(61.4)
+
+        self.assertEqual(fetcher.fetch(94040), observation(61.4))
+        with open(self.path.format(94040)) as file:
+            self.assertEqual(json.loads(file.read())['data'], observation(61.4))
+
+        os.remove(self.path.format(94040))
+        self.assertEqual(fetcher.fetch(94040), observation(61.4))
+        self.assertEqual(fetcher._wrapped_fetched.fetch.call_count, 1)
+
+    def test_plugin_updates_only_when_text_changes(self):
+        plugin = weather.WeatherPlugin()
+        plugin._fetcher._wrapped_fetched.fetch.side_effect = [
+            observation(61.4), observation(61.2), observation(63.0)]
+
+        instance, layer = FakeInstance(), FakeLayer()
+        with mock.patch.object(weather, 'SHOULD_REFRESH_SECONDS', 0):
+            plugin.setup_plugin(instance, layer)
+
+            deadline = time.monotonic() + 5
+            while plugin._display_text(plugin._weather) != '63':
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+            plugin.shutdown()
+
+        self.assertEqual(plugin._display_text(plugin._weather), '63')
+        # Once at setup, then for 61 and 63 but not the repeated 61.
+        self.assertEqual(layer.invalidated, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()